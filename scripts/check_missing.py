@@ -3,81 +3,262 @@
 週次/月次CSVの欠番チェックスクリプト
 """
 
+import os
 import re
 import sys
 from collections import defaultdict
-from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 
+# パスの設定
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
-def weeks_in_year(year: int) -> int:
-    """指定年の週数を取得(ISO週番号基準)"""
-    return date(year, 12, 28).isocalendar()[1]
+from src.utils.periods import weeks_in_year
 
+# ファイル名パターン(高速パスで分解できないファイル名のフォールバック用)
+PAT_WEEK = re.compile(rb"(?P<base>.+?_weekly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)", re.ASCII)
+PAT_MONTH = re.compile(rb"(?P<base>.+?_monthly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)", re.ASCII)
 
-# ファイル名パターン
-PAT_WEEK = re.compile(r"(?P<base>.+?_weekly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)")
-PAT_MONTH = re.compile(r"(?P<base>.+?_monthly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)")
+# 改行区切りで連結したファイル名に一括適用するパターン(マッチが行をまたがないよう改行を除外)
+PAT_WEEK_LINES = re.compile(PAT_WEEK.pattern.replace(rb"[^_]", rb"[^_\n]"), re.ASCII)
+PAT_MONTH_LINES = re.compile(PAT_MONTH.pattern.replace(rb"[^_]", rb"[^_\n]"), re.ASCII)
 
+# 一括マッチに切り替えるファイル数の下限
+BATCH_MATCH_MIN = 64
 
-def collect(data_dir: Path):
-    """ファイルを収集して解析"""
-    weekly, monthly = defaultdict(set), defaultdict(set)
 
-    for p in data_dir.rglob("*.csv"):
-        m = PAT_WEEK.search(p.name)
+def _iter_csv(root: bytes):
+    """ディレクトリを再帰的に走査してCSVファイル名(bytes)を列挙"""
+    stack = [root]
+    while stack:
+        with os.scandir(stack.pop()) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.name.endswith(b".csv"):
+                    yield entry.name
+
+
+def _match_period(parts, i):
+    """parts[i]が4桁の年、parts[i + 1]が1-2桁の番号+区切り(_ or -)であれば(年, 番号)を返す"""
+    if len(parts) < i + 2:
+        return None
+
+    year, tail = parts[i], parts[i + 1]
+    if len(year) != 4 or not year.isdigit():
+        return None
+
+    n = 2 if tail[:2].isdigit() else 1 if tail[:1].isdigit() else 0
+    term = tail[n : n + 1]
+    # 番号の直後は '-'、またはトークン末尾で次の '_' が続く必要がある
+    if n and (term == b"-" or (not term and len(parts) > i + 2)):
+        return year, tail[:n]
+    return None
+
+
+def _split_name(name: bytes, pos: int, base_end: int):
+    """正規表現を使わずにファイル名を(base, 年, 番号)に分解
+
+    posは最初の "_weekly_" / "_monthly_" の位置、base_endはその末尾の '_' の位置。
+    正規表現と同じ結果を保証できない場合はNoneを返し、呼び出し側で正規表現にフォールバックする。
+    """
+    if pos < 1:
+        return None
+
+    parts = name[base_end + 1 :].split(b"_", 3)
+
+    # サブ分類なし: {base}_{year}_{idx}
+    period = _match_period(parts, 0)
+    if period:
+        return name[:base_end], *period
+
+    # サブ分類あり: {base}_{sub}_{year}_{idx}
+    if parts[0]:
+        period = _match_period(parts, 1)
+        if period:
+            return name[: base_end + 1 + len(parts[0])], *period
+    return None
+
+
+def _match_names(pat, lines_pat, names):
+    """正規表現でファイル名を解析して(base, 年, 番号)を列挙
+
+    ファイル数が多い場合は改行で連結した文字列にfinditerを1回適用し、
+    ファイル名ごとの正規表現呼び出しを省く。各ファイル名の最初のマッチのみを採用する。
+    """
+    # 改行を含むファイル名は連結できないため個別にマッチする
+    batch = [name for name in names if b"\n" not in name]
+    single = [name for name in names if b"\n" in name]
+    if len(batch) < BATCH_MATCH_MIN:
+        batch, single = [], names
+
+    for name in single:
+        m = pat.search(name)
         if m:
-            d = m.groupdict()
-            weekly[(d["base"], int(d["year"]))].add(int(d["idx"]))
+            yield m.group(1, 2, 3)
+
+    if not batch:
+        return
+
+    joined = b"\n".join(batch)
+    last_line_start = -2  # rfindは先頭行で-1を返すため、それと衝突しない初期値
+    for m in lines_pat.finditer(joined):
+        line_start = joined.rfind(b"\n", 0, m.start())
+        if line_start == last_line_start:
+            continue  # 同じファイル名内の2つ目以降のマッチ
+        last_line_start = line_start
+        yield m.group(1, 2, 3)
+
+
+def _parse_both(name: bytes, weekly, monthly):
+    """週次・月次の両方を含むファイル名を週次として解析し、解析できなければ月次として解析する"""
+    m = PAT_WEEK.search(name)
+    if m:
+        yield weekly, m.group(1, 2, 3)
+    elif m := PAT_MONTH.search(name):
+        yield monthly, m.group(1, 2, 3)
+
+
+def _parse(names, weekly, monthly):
+    """ファイル名を解析して週次/月次の辞書に登録し、新たに登録した(週次件数, 月次件数)を返す"""
+    # 同じbaseは多数のファイルで繰り返されるため、デコード結果をinternしてキーを共有
+    bases: dict[bytes, str] = {}
+    pending_weekly, pending_monthly = [], []
+    parsed_names = []
+    for name in names:
+        # 正規表現の前に安価な部分文字列検索で対象外ファイルを除外
+        weekly_pos = name.find(b"_weekly_")
+        monthly_pos = name.find(b"_monthly_")
+        if weekly_pos >= 0 and monthly_pos >= 0:
+            parsed_names.extend(_parse_both(name, weekly, monthly))
+            continue
+        if weekly_pos >= 0:
+            pos, base_end, pending, found = weekly_pos, weekly_pos + 7, pending_weekly, weekly
+        elif monthly_pos >= 0:
+            pos, base_end, pending, found = monthly_pos, monthly_pos + 8, pending_monthly, monthly
+        else:
             continue
 
-        m = PAT_MONTH.search(p.name)
-        if m:
-            d = m.groupdict()
-            monthly[(d["base"], int(d["year"]))].add(int(d["idx"]))
+        parsed = _split_name(name, pos, base_end)
+        if parsed is None:
+            # 高速パスで分解できないファイル名は後で正規表現にまとめて掛ける
+            pending.append(name)
+            continue
+        parsed_names.append((found, parsed))
 
+    parsed_names.extend((weekly, parsed) for parsed in _match_names(PAT_WEEK, PAT_WEEK_LINES, pending_weekly))
+    parsed_names.extend((monthly, parsed) for parsed in _match_names(PAT_MONTH, PAT_MONTH_LINES, pending_monthly))
+
+    total_weekly = total_monthly = 0
+    for found, (raw_base, year, idx) in parsed_names:
+        base = bases.get(raw_base)
+        if base is None:
+            base = bases[raw_base] = sys.intern(os.fsdecode(raw_base))
+
+        # 週/月番号はビットマスクで保持(週次は最大53ビット、月次は12ビット)
+        key, bit = (base, int(year)), 1 << int(idx)
+        mask = found[key]
+        if mask & bit:
+            continue
+        found[key] = mask | bit
+        if found is weekly:
+            total_weekly += 1
+        else:
+            total_monthly += 1
+
+    return total_weekly, total_monthly
+
+
+def _walk_and_parse(root: bytes):
+    """サブディレクトリ配下を走査・解析(スレッドプールのタスク単位)"""
+    weekly: defaultdict[tuple[str, int], int] = defaultdict(int)
+    monthly: defaultdict[tuple[str, int], int] = defaultdict(int)
+    _parse(_iter_csv(root), weekly, monthly)
     return weekly, monthly
 
 
+def _merge(dest, src) -> int:
+    """ビットマスクの辞書をマージし、新たに立ったビット数を返す"""
+    added = 0
+    for key, mask in src.items():
+        current = dest[key]
+        added += (mask & ~current).bit_count()
+        dest[key] = current | mask
+    return added
+
+
+def collect(data_dir: str | bytes | os.PathLike):
+    """ファイルを収集して解析(走査中はPathを生成せず、bytesのパス・ファイル名のみを扱う)
+
+    Returns:
+        (週次マップ, 月次マップ, 週次ファイル数, 月次ファイル数)
+    """
+    weekly: defaultdict[tuple[str, int], int] = defaultdict(int)
+    monthly: defaultdict[tuple[str, int], int] = defaultdict(int)
+
+    # 直下のファイルはその場で解析し、サブディレクトリはスレッドプールで並列に走査
+    names, subdirs = [], []
+    with os.scandir(os.fsencode(data_dir)) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.path)
+            elif entry.name.endswith(b".csv"):
+                names.append(entry.name)
+
+    total_weekly, total_monthly = _parse(names, weekly, monthly)
+
+    if subdirs:
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(subdirs))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for sub_weekly, sub_monthly in executor.map(_walk_and_parse, subdirs):
+                total_weekly += _merge(weekly, sub_weekly)
+                total_monthly += _merge(monthly, sub_monthly)
+
+    return weekly, monthly, total_weekly, total_monthly
+
+
 def analyse(found, current_limit, max_func):
-    """欠番を分析"""
-    today = datetime.now()
-    missing = defaultdict(lambda: defaultdict(list))
+    """欠番を分析(base, 年の順に (base, year, lost) を逐次生成)"""
+    cur_year = datetime.now().year
+    # 年ごとの上限は年単位で1回だけ求める
+    limits: dict[int, int] = {}
 
-    for (base, year), idxs in found.items():
-        limit = current_limit if year == today.year else max_func(year)
-        expect = set(range(1, limit + 1))
-        lost = sorted(expect - idxs)
+    for (base, year), mask in sorted(found.items()):
+        limit = limits.get(year)
+        if limit is None:
+            limit = limits[year] = current_limit if year == cur_year else max_func(year)
+        # rangeを順に走査するため結果は既にソート済み
+        lost = [i for i in range(1, limit + 1) if not (mask >> i) & 1]
         if lost:
-            missing[base][year] = lost
-    return missing
+            yield base, year, lost
 
 
-def report(title, info):
-    """レポート出力"""
-    print(f"\n=== {title} ===")
-    if not info:
-        print("✓ 欠番なし")
-        return
+def report(title, missing):
+    """レポート出力(analyseの結果を逐次消費し、1回の書き込みで出力)"""
+    lines = [f"\n=== {title} ==="]
 
     total_missing = 0
-    for base in sorted(info):
-        print(f"[{base}]")
-        for y, lost in sorted(info[base].items()):
-            print(f"  ✗ {y}: {', '.join(map(str, lost))}")
-            total_missing += len(lost)
+    current_base = None
+    for base, y, lost in missing:
+        if base != current_base:
+            lines.append(f"[{base}]")
+            current_base = base
+        lines.append(f"  ✗ {y}: {', '.join(map(str, lost))}")
+        total_missing += len(lost)
 
-    print(f"\n合計欠番数: {total_missing}")
+    if current_base is None:
+        lines.append("✓ 欠番なし")
+    else:
+        lines.append(f"\n合計欠番数: {total_missing}")
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def main():
     """メイン処理"""
-    if len(sys.argv) != 2:
-        data_dir = Path("data/raw")  # デフォルトディレクトリ
-    else:
-        data_dir = Path(sys.argv[1])
-
-    data_dir = data_dir.expanduser().resolve()
+    # Pathを扱うのはCLIの入口のみ(デフォルトディレクトリ: data/raw)
+    data_dir = Path(sys.argv[1] if len(sys.argv) == 2 else "data/raw").expanduser().resolve()
 
     if not data_dir.is_dir():
         print(f"ディレクトリが見つかりません: {data_dir}")
@@ -86,7 +267,7 @@ def main():
 
     print(f"データディレクトリ: {data_dir}")
 
-    w_map, m_map = collect(data_dir)
+    w_map, m_map, total_weekly, total_monthly = collect(data_dir)
     today = datetime.now()
 
     # 現在の週と月
@@ -95,18 +276,11 @@ def main():
 
     print(f"現在: {today.year}年 第{current_week}週 / {current_month}月")
 
-    # 欠番分析
-    miss_w = analyse(w_map, current_week, weeks_in_year)
-    miss_m = analyse(m_map, current_month, lambda _: 12)
-
-    # レポート出力
-    report("週次ファイルの欠番", miss_w)
-    report("月次ファイルの欠番", miss_m)
+    # 欠番分析とレポート出力(中間の欠番辞書は作らずに逐次出力)
+    report("週次ファイルの欠番", analyse(w_map, current_week, weeks_in_year))
+    report("月次ファイルの欠番", analyse(m_map, current_month, lambda _: 12))
 
     # 統計情報
-    total_weekly = sum(len(idxs) for idxs in w_map.values())
-    total_monthly = sum(len(idxs) for idxs in m_map.values())
-
     print("\n=== 統計情報 ===")
     print(f"週次ファイル: {total_weekly}件")
     print(f"月次ファイル: {total_monthly}件")
@@ -4,21 +4,24 @@
 """
 
 import argparse
+import asyncio
 import json
 import logging
 import random
 import sys
-import time
-from datetime import date, datetime
+from contextlib import nullcontext
+from datetime import datetime
+from functools import partial
 from pathlib import Path
 from typing import Any
 
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from src.fetchers.enhanced_fetcher import DataFetcherConfig, EnhancedEpidemicDataFetcher, FetchParams
+from src.fetchers.enhanced_fetcher import REPORT_TYPE_MAP, DataFetcherConfig, EnhancedEpidemicDataFetcher, FetchParams
 from src.managers.config_manager import ConfigurationManager, DataCollectionConfig
 from src.managers.storage_manager import StorageManager
+from src.utils.periods import weeks_in_year
 
 
 # ロギング設定
@@ -58,6 +61,9 @@ class DataCollector:
         self.target_months = target_months
         self.logger = logging.getLogger(__name__)
 
+        # データタイプ別の取得仕様（フェッチメソッド, 感染症コード, レポートタイプ, 月次か）のキャッシュ
+        self._data_type_specs: dict[str, tuple[Any, str, str, bool]] = {}
+
         # フェッチャー初期化
         fetcher_config = DataFetcherConfig(max_retries=3, base_delay=1.0, timeout=30, rate_limit_delay=1.5)
         self.fetcher = EnhancedEpidemicDataFetcher(fetcher_config)
@@ -116,7 +122,7 @@ class DataCollector:
 
     def _collect_data_type(self, data_type: str, start_year: int, end_year: int):
         """特定のデータタイプを収集"""
-        is_monthly = "monthly" in data_type
+        is_monthly = self._get_data_type_spec(data_type)[3]
 
         # 強制更新モードの場合、すべてのデータを再取得
         if self.force_update:
@@ -159,70 +165,103 @@ class DataCollector:
 
     def _process_batch(self, params_batch: list[FetchParams], data_type: str, is_monthly: bool):
         """バッチ処理"""
-        for params in params_batch:
-            self.stats["total_files"] += 1
+        asyncio.run(self._process_batch_async(params_batch, data_type, is_monthly))
+
+    async def _process_batch_async(self, params_batch: list[FetchParams], data_type: str, is_monthly: bool):
+        """バッチ内のデータ取得を同時実行数を制限しながら並行処理"""
+        # ループ内で繰り返し参照する属性・関数はローカル変数に束縛しておく
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.config.collection.concurrency)
+        stats = self.stats
+        logger = self.logger
+        dry_run = self.dry_run
+        force_update = self.force_update
+        fetch = self.fetcher.fetch_with_retry
+        save = self.storage.save_with_metadata
+        uniform = random.uniform
+        fetch_method, epid_code, _, _ = self._get_data_type_spec(data_type)
+
+        async def _process_one(params: FetchParams):
+            stats["total_files"] += 1
 
             # データ取得
-            fetch_method = self._get_fetch_method(data_type)
             if not fetch_method:
-                self.logger.error(f"不明なデータタイプ: {data_type}")
-                self.stats["failed"] += 1
-                continue
-
-            # パラメータ準備
-            fetch_params = {
-                "start_year": params.start_year,
-                "start_sub_period": params.start_sub_period,
-                "end_year": params.end_year,
-                "end_sub_period": params.end_sub_period,
-                "pref_code": params.pref_code,
-                "hc_code": params.hc_code,
-                "epid_code": self._get_epid_code(data_type),
-                "total_mode": params.total_mode,
-            }
+                logger.error(f"不明なデータタイプ: {data_type}")
+                stats["failed"] += 1
+                return
+
+            # データ取得実行（HTTP通信はスレッドで実行し、イベントループをブロックしない）
+            async with semaphore:
+                result = await loop.run_in_executor(
+                    None,
+                    partial(
+                        fetch,
+                        fetch_method,
+                        start_year=params.start_year,
+                        start_sub_period=params.start_sub_period,
+                        end_year=params.end_year,
+                        end_sub_period=params.end_sub_period,
+                        pref_code=params.pref_code,
+                        hc_code=params.hc_code,
+                        epid_code=epid_code,
+                        total_mode=params.total_mode,
+                    ),
+                )
 
-            # データ取得実行
-            result = self.fetcher.fetch_with_retry(fetch_method, **fetch_params)
-
-            if result.success:
-                # データ保存
-                if not self.dry_run:
-                    # 強制更新モードの場合、既存ファイルも上書き
-                    save_result = self.storage.save_with_metadata(
-                        result.data,
-                        data_type,
-                        int(params.start_year),
-                        int(params.start_sub_period),
-                        is_monthly,
-                        {"fetch_time": result.fetch_time},
-                        force_overwrite=self.force_update,  # 強制更新フラグを渡す
-                    )
+                # レート制限（ジッター付きでサーバー負荷を分散）
+                await asyncio.sleep(0.5 + uniform(0, 0.3))
+
+            if not result.success:
+                stats["failed"] += 1
+                stats["errors"].append(str(result.error))
+                logger.error(f"データ取得失敗: {result.error}")
+                return
+
+            if dry_run:
+                logger.info(f"[DRY RUN] データ取得成功: {data_type} {params.start_year}-{params.start_sub_period}")
+                stats["successful"] += 1
+                return
+
+            # 取得できたものから順に保存する（途中で中断されても取得済みのデータを失わない）
+            save_result = save(
+                data=result.data,
+                data_type=data_type,
+                year=int(params.start_year),
+                period=int(params.start_sub_period),
+                is_monthly=is_monthly,
+                additional_metadata={"fetch_time": result.fetch_time},
+                force_overwrite=force_update,  # 強制更新モードの場合、既存ファイルも上書き
+                sha256_hash=result.metadata.sha256_hash if result.metadata else None,
+            )
 
-                    if save_result.is_duplicate and not self.force_update:
-                        self.stats["duplicates"] += 1
-                    elif save_result.success:
-                        self.stats["successful"] += 1
-                        if save_result.is_new:
-                            self.stats["new_files"] += 1
-                        else:
-                            self.stats["updated_files"] += 1
-                    else:
-                        self.stats["failed"] += 1
-                        self.stats["errors"].append(save_result.error)
+            if save_result.is_duplicate and not force_update:
+                stats["duplicates"] += 1
+            elif save_result.success:
+                stats["successful"] += 1
+                if save_result.is_new:
+                    stats["new_files"] += 1
                 else:
-                    self.logger.info(
-                        f"[DRY RUN] データ取得成功: {data_type} {params.start_year}-{params.start_sub_period}"
-                    )
-                    self.stats["successful"] += 1
+                    stats["updated_files"] += 1
             else:
-                self.stats["failed"] += 1
-                self.stats["errors"].append(str(result.error))
-                self.logger.error(f"データ取得失敗: {result.error}")
-
-            # レート制限（ジッター付きでサーバー負荷を分散）
-            base_delay = 0.5
-            jitter = random.uniform(0, 0.3)
-            time.sleep(base_delay + jitter)
+                stats["failed"] += 1
+                stats["errors"].append(save_result.error)
+
+        # ハッシュインデックスの書き出しはバッチ単位にまとめる（ドライランでは何も書き出さない）
+        with nullcontext() if dry_run else self.storage.batch_save():
+            await asyncio.gather(*(_process_one(params) for params in params_batch))
+
+    def _get_data_type_spec(self, data_type: str) -> tuple[Any, str, str, bool]:
+        """データタイプ別の取得仕様を取得（初回のみ計算してキャッシュ）"""
+        spec = self._data_type_specs.get(data_type)
+        if spec is None:
+            spec = (
+                self._get_fetch_method(data_type),
+                self._get_epid_code(data_type),
+                self._get_report_type(data_type),
+                "monthly" in data_type,
+            )
+            self._data_type_specs[data_type] = spec
+        return spec
 
     def _get_fetch_method(self, data_type: str):
         """データタイプに対応するフェッチメソッドを取得"""
@@ -240,63 +279,43 @@ class DataCollector:
     ) -> list[FetchParams]:
         """全期間のパラメータを生成"""
         params_list = []
+        report_type = self._get_data_type_spec(data_type)[2]
         current_date = datetime.now()
+        targets = self.target_months if is_monthly else self.target_weeks
 
         for year in range(start_year, end_year + 1):
             if is_monthly:
                 max_period = 12 if year < current_date.year else current_date.month
-                for month in range(1, max_period + 1):
-                    # 対象月が指定されている場合はフィルタリング
-                    if self.target_months and month not in self.target_months:
-                        continue
-                    params = FetchParams(
-                        start_year=str(year),
-                        start_sub_period=str(month),
-                        end_year=str(year),
-                        end_sub_period=str(month),
-                        data_type=data_type,
-                        report_type=self._get_report_type(data_type),
-                    )
-                    params_list.append(params)
             else:
-                max_week = self._get_weeks_in_year(year)
+                max_period = self._get_weeks_in_year(year)
                 if year == current_date.year:
-                    max_week = min(max_week, current_date.isocalendar()[1])
-
-                for week in range(1, max_week + 1):
-                    # 対象週が指定されている場合はフィルタリング
-                    if self.target_weeks and week not in self.target_weeks:
-                        continue
-                    params = FetchParams(
-                        start_year=str(year),
-                        start_sub_period=str(week),
-                        end_year=str(year),
-                        end_sub_period=str(week),
+                    max_period = min(max_period, current_date.isocalendar()[1])
+
+            year_str = str(year)
+            for period in range(1, max_period + 1):
+                # 対象週・月が指定されている場合はフィルタリング
+                if targets and period not in targets:
+                    continue
+                params_list.append(
+                    FetchParams(
+                        start_year=year_str,
+                        start_sub_period=str(period),
+                        end_year=year_str,
+                        end_sub_period=str(period),
                         data_type=data_type,
-                        report_type=self._get_report_type(data_type),
+                        report_type=report_type,
                     )
-                    params_list.append(params)
+                )
 
         return params_list
 
     def _get_report_type(self, data_type: str) -> str:
         """レポートタイプを取得"""
-        report_types = {
-            "sentinel_weekly_gender": "1",
-            "sentinel_weekly_age": "0",
-            "sentinel_weekly_health_center": "2",
-            "sentinel_weekly_medical_district": "5",
-            "sentinel_monthly_gender": "15",
-            "sentinel_monthly_age": "10",
-            "sentinel_monthly_health_center": "11",
-            "sentinel_monthly_medical_district": "12",
-            "notifiable_weekly": "20",
-        }
-        return report_types.get(data_type, "0")
+        return REPORT_TYPE_MAP.get(data_type, "0")
 
     def _get_weeks_in_year(self, year: int) -> int:
         """年の週数を取得"""
-        return date(year, 12, 28).isocalendar()[1]
+        return weeks_in_year(year)
 
     def _check_execution_time(self) -> bool:
         """実行時間制限チェック"""
@@ -413,11 +432,15 @@ def main():
             stats_file = Path("data/logs") / f"stats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
             stats_file.parent.mkdir(parents=True, exist_ok=True)
 
-            # datetimeオブジェクトを文字列に変換
-            stats_json = {k: v.isoformat() if isinstance(v, datetime) else v for k, v in stats.items()}
+            # datetimeオブジェクトを文字列に変換（datetimeを持つのは開始・終了時刻のみ）
+            stats_json = {
+                **stats,
+                "start_time": stats["start_time"].isoformat(),
+                "end_time": stats["end_time"].isoformat(),
+            }
 
-            with stats_file.open("w") as f:
-                json.dump(stats_json, f, indent=2, ensure_ascii=False)
+            # 一括でシリアライズして1回の書き込みで保存
+            stats_file.write_text(json.dumps(stats_json, indent=2, ensure_ascii=False), encoding="utf-8")
 
         # 終了コード
         if stats["failed"] > 0:
@@ -6,15 +6,42 @@
 """
 
 import argparse
+import io
 import json
 import logging
+import os
+import re
 import sys
 from dataclasses import dataclass, field
-from datetime import date, datetime
+from datetime import datetime
 from pathlib import Path
 from typing import Any
 from zoneinfo import ZoneInfo
 
+# パスの設定
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.periods import weeks_in_year
+
+# 検証対象のデータタイプ
+DATA_TYPES = (
+    "sentinel_weekly_gender",
+    "sentinel_weekly_age",
+    "sentinel_weekly_health_center",
+    "sentinel_weekly_medical_district",
+    "notifiable_weekly",
+    "sentinel_monthly_gender",
+    "sentinel_monthly_age",
+    "sentinel_monthly_health_center",
+    "sentinel_monthly_medical_district",
+)
+
+# (データタイプ, 小文字のファイル名接頭辞)
+_DATA_TYPE_PREFIXES = tuple((data_type, f"{data_type.lower()}_") for data_type in DATA_TYPES)
+
+# ファイル名末尾の「_年_期間番号」
+PERIOD_SUFFIX_PATTERN = re.compile(r"._(\d{4})_(\d{1,2})\Z", re.ASCII)
+
 
 @dataclass
 class ContinuityReport:
@@ -25,10 +52,34 @@ class ContinuityReport:
     end_year: int
     expected_count: int
     actual_count: int
-    missing_periods: list[dict[str, Any]] = field(default_factory=list)
+    missing_periods: list[tuple[int, int]] = field(default_factory=list)  # (年, 期間)
     unexpected_files: list[str] = field(default_factory=list)
     is_valid: bool = True
     error_messages: list[str] = field(default_factory=list)
+    # by_year()の結果のキャッシュ
+    _by_year: dict[int, list[int]] | None = field(default=None, init=False, repr=False, compare=False)
+
+    def by_year(self) -> dict[int, list[int]]:
+        """欠損期間を年ごとにグループ化（年・期間の昇順、結果はキャッシュ）"""
+        if self._by_year is None:
+            by_year: dict[int, list[int]] = {}
+            for year, period in sorted(self.missing_periods):
+                by_year.setdefault(year, []).append(period)
+            self._by_year = by_year
+        return self._by_year
+
+    def missing_as_dicts(self) -> list[dict[str, Any]]:
+        """欠損期間をレポート出力用の辞書形式に変換"""
+        period_type = "monthly" if "monthly" in self.data_type else "weekly"
+        return [
+            {
+                "year": year,
+                "period": period,
+                "type": period_type,
+                "filename": f"{self.data_type}_{year}_{period:02d}.csv",
+            }
+            for year, period in self.missing_periods
+        ]
 
 
 class ContinuityValidator:
@@ -39,6 +90,12 @@ class ContinuityValidator:
         self.logger = logging.getLogger(__name__)
         # 日本時間を使用
         self.jst = ZoneInfo("Asia/Tokyo")
+        # ディレクトリ走査結果のキャッシュ（小文字化したファイル名, パス）
+        self._entries_cache: list[tuple[str, Path]] | None = None
+        # validate_all実行中に全データタイプで共有する現在時刻
+        self._now: datetime | None = None
+        # validate_all実行中に1回の走査で振り分けたデータタイプごとのファイル
+        self._files_by_type: dict[str, list[Path]] | None = None
 
     def validate_all(self, start_year: int | None = None, end_year: int | None = None) -> dict[str, ContinuityReport]:
         """全データタイプの連続性を検証
@@ -52,24 +109,28 @@ class ContinuityValidator:
         """
         reports = {}
 
-        # データタイプのリスト
-        data_types = [
-            "sentinel_weekly_gender",
-            "sentinel_weekly_age",
-            "sentinel_weekly_health_center",
-            "sentinel_weekly_medical_district",
-            "notifiable_weekly",
-            "sentinel_monthly_gender",
-            "sentinel_monthly_age",
-            "sentinel_monthly_health_center",
-            "sentinel_monthly_medical_district",
-        ]
-
-        for data_type in data_types:
-            report = self.validate_data_type(data_type, start_year, end_year)
-            reports[data_type] = report
-            if not report.is_valid:
-                self.logger.warning(f"{data_type}: {len(report.missing_periods)}件の欠損を検出")
+        # 最新のディレクトリ内容で検証するため、走査結果のキャッシュを破棄
+        self._entries_cache = None
+        # 全データタイプで同じ「現在の年・週・月」を基準にする
+        self._now = datetime.now(self.jst)
+
+        # ファイル一覧を1回だけ走査し、接頭辞でデータタイプごとに振り分ける
+        files_by_type: dict[str, list[Path]] = {data_type: [] for data_type in DATA_TYPES}
+        for lower_name, file_path in self._list_entries():
+            for data_type, prefix in _DATA_TYPE_PREFIXES:
+                if lower_name.startswith(prefix):
+                    files_by_type[data_type].append(file_path)
+        self._files_by_type = files_by_type
+
+        try:
+            for data_type in DATA_TYPES:
+                report = self.validate_data_type(data_type, start_year, end_year)
+                reports[data_type] = report
+                if not report.is_valid:
+                    self.logger.warning(f"{data_type}: {len(report.missing_periods)}件の欠損を検出")
+        finally:
+            self._now = None
+            self._files_by_type = None
 
         return reports
 
@@ -86,12 +147,15 @@ class ContinuityValidator:
         Returns:
             検証レポート
         """
+        # CLI引数などから渡された文字列もDATA_TYPESのリテラルと同一オブジェクトにそろえる
+        data_type = sys.intern(data_type)
+
         # ファイルのリストを取得（大文字小文字を区別しない）
-        # 注：glob自体は大文字小文字を区別するため、後続処理で対応
-        files = []
-        for file_path in self.data_dir.glob("*.csv"):
-            if file_path.name.lower().startswith(f"{data_type.lower()}_"):
-                files.append(file_path)
+        if self._files_by_type is not None and data_type in self._files_by_type:
+            files = self._files_by_type[data_type]
+        else:
+            prefix = f"{data_type.lower()}_"
+            files = [file_path for lower_name, file_path in self._list_entries() if lower_name.startswith(prefix)]
 
         if not files:
             return ContinuityReport(
@@ -104,70 +168,58 @@ class ContinuityValidator:
                 error_messages=["データファイルが見つかりません"],
             )
 
+        now = self._now if self._now is not None else datetime.now(self.jst)
+
         # 月次か週次かを判定
         is_monthly = "monthly" in data_type
 
-        # ファイルから年と期間を抽出
-        existing_periods = set()
-        years = set()
+        # ファイルから年と期間を抽出（期間番号は年ごとのビットマスクで保持）
+        existing_masks: dict[int, int] = {}
+        max_period = 12 if is_monthly else 53
         for file_path in files:
-            parts = file_path.stem.split("_")
-            # ファイル名の形式を動的に判定
-            # 形式1: notifiable_weekly_2025_01 (4パーツ)
-            # 形式2: sentinel_weekly_gender_2025_01 (5パーツ)
-            # 形式3: sentinel_monthly_medical_district_2025_01 (6パーツ)
+            # ファイル名の形式
+            # 形式1: notifiable_weekly_2025_01
+            # 形式2: sentinel_weekly_gender_2025_01
+            # 形式3: sentinel_monthly_medical_district_2025_01
             # 末尾の2つが年と期間番号の場合のみ処理
-            if len(parts) >= 3:  # 最低限: データタイプ_年_期間
-                try:
-                    # 末尾から2番目と最後を年と期間として解釈
-                    year = int(parts[-2])
-                    period = int(parts[-1])
-
-                    # 年と期間の妥当性チェック
-                    # 年: 1900-2100の範囲
-                    # 週: 1-53の範囲、月: 1-12の範囲
-                    if 1900 <= year <= 2100:
-                        if is_monthly:
-                            if 1 <= period <= 12:
-                                existing_periods.add((year, period))
-                                years.add(year)
-                        elif 1 <= period <= 53:
-                            existing_periods.add((year, period))
-                            years.add(year)
-                except (ValueError, IndexError):
-                    # 数値変換に失敗した場合はスキップ
-                    self.logger.debug(f"ファイル名のパースをスキップ: {file_path.name}")
-                    continue
+            m = PERIOD_SUFFIX_PATTERN.search(file_path.stem)
+            if m is None:
+                self.logger.debug(f"ファイル名のパースをスキップ: {file_path.name}")
+                continue
+
+            year, period = int(m.group(1)), int(m.group(2))
+
+            # 年と期間の妥当性チェック
+            # 年: 1900-2100の範囲
+            # 週: 1-53の範囲、月: 1-12の範囲
+            if 1900 <= year <= 2100 and 1 <= period <= max_period:
+                existing_masks[year] = existing_masks.get(year, 0) | (1 << period)
 
         # 開始年と終了年を決定
         if start_year is None:
-            start_year = min(years) if years else 2000
+            start_year = min(existing_masks) if existing_masks else 2000
         if end_year is None:
-            end_year = max(years) if years else datetime.now(self.jst).year
+            end_year = max(existing_masks) if existing_masks else now.year
 
         # 期待される期間を生成
-        expected_periods = self._generate_expected_periods(data_type, start_year, end_year, is_monthly)
+        expected_masks = self._generate_expected_masks(start_year, end_year, is_monthly, now)
 
-        # 欠損期間を特定
+        # 欠損期間を特定（年ごとに期待ビットから既存ビットを除き、残ったビットを下位から取り出す）
         missing_periods = []
-        for year, period in expected_periods:
-            if (year, period) not in existing_periods:
-                missing_periods.append(
-                    {
-                        "year": year,
-                        "period": period,
-                        "type": "monthly" if is_monthly else "weekly",
-                        "filename": f"{data_type}_{year}_{period:02d}.csv",
-                    }
-                )
+        for year, expected_mask in expected_masks.items():
+            lost = expected_mask & ~existing_masks.get(year, 0)
+            while lost:
+                lowest = lost & -lost
+                lost ^= lowest
+                missing_periods.append((year, lowest.bit_length() - 1))
 
         # レポート作成
         report = ContinuityReport(
             data_type=data_type,
             start_year=start_year,
             end_year=end_year,
-            expected_count=len(expected_periods),
-            actual_count=len(existing_periods),
+            expected_count=sum(mask.bit_count() for mask in expected_masks.values()),
+            actual_count=sum(mask.bit_count() for mask in existing_masks.values()),
             missing_periods=missing_periods,
             is_valid=len(missing_periods) == 0,
         )
@@ -177,44 +229,58 @@ class ContinuityValidator:
 
         return report
 
-    def _generate_expected_periods(
-        self, data_type: str, start_year: int, end_year: int, is_monthly: bool
-    ) -> set[tuple[int, int]]:
-        """期待される期間のセットを生成
+    def _list_entries(self) -> list[tuple[str, Path]]:
+        """データディレクトリ内のCSVファイルを列挙（結果はキャッシュし、全データタイプで共有）
+
+        Returns:
+            (小文字化したファイル名, パス)のタプルのリスト
+        """
+        if self._entries_cache is None:
+            entries = []
+            with os.scandir(self.data_dir) as it:
+                for entry in it:
+                    lower_name = entry.name.lower()
+                    if lower_name.endswith(".csv") and entry.is_file():
+                        entries.append((lower_name, Path(entry.path)))
+            self._entries_cache = entries
+        return self._entries_cache
+
+    def _generate_expected_masks(
+        self, start_year: int, end_year: int, is_monthly: bool, now: datetime | None = None
+    ) -> dict[int, int]:
+        """期待される期間を年ごとのビットマスクで生成
 
         Args:
-            data_type: データタイプ
             start_year: 開始年
             end_year: 終了年
             is_monthly: 月次データかどうか
+            now: 基準とする現在時刻（Noneの場合は現在時刻を取得）
 
         Returns:
-            (年, 期間)のタプルのセット
+            年 -> 期間番号のビットマスク（ビットiが期間iに対応）の辞書
         """
-        expected = set()
-        current_date = datetime.now(self.jst)
+        expected = {}
+        current_date = now if now is not None else datetime.now(self.jst)
 
         for year in range(start_year, end_year + 1):
             if is_monthly:
                 # 月次データの場合
-                max_month = 12 if year < current_date.year else current_date.month
-                for month in range(1, max_month + 1):
-                    expected.add((year, month))
+                max_period = 12 if year < current_date.year else current_date.month
             else:
                 # 週次データの場合
-                max_week = self._get_weeks_in_year(year)
+                max_period = self._get_weeks_in_year(year)
                 if year == current_date.year:
                     # 現在年の場合は現在週まで
-                    max_week = min(max_week, current_date.isocalendar()[1])
+                    max_period = min(max_period, current_date.isocalendar()[1])
 
-                for week in range(1, max_week + 1):
-                    expected.add((year, week))
+            # 期間1からmax_periodまでのビットを立てる
+            expected[year] = ((1 << max_period) - 1) << 1
 
         return expected
 
     def _get_weeks_in_year(self, year: int) -> int:
         """指定年の週数を取得"""
-        return date(year, 12, 28).isocalendar()[1]
+        return weeks_in_year(year)
 
     def generate_report(self, reports: dict[str, ContinuityReport], output_format: str = "json") -> str:
         """レポートを生成
@@ -236,120 +302,124 @@ class ContinuityValidator:
 
     def _generate_json_report(self, reports: dict[str, ContinuityReport]) -> str:
         """JSON形式のレポートを生成"""
-        report_dict = {}
-        for data_type, report in reports.items():
-            report_dict[data_type] = {
+        report_dict = {
+            data_type: {
                 "start_year": report.start_year,
                 "end_year": report.end_year,
                 "expected_count": report.expected_count,
                 "actual_count": report.actual_count,
                 "missing_count": len(report.missing_periods),
                 "is_valid": report.is_valid,
-                "missing_periods": report.missing_periods,
+                "missing_periods": report.missing_as_dicts(),
                 "error_messages": report.error_messages,
             }
+            for data_type, report in reports.items()
+        }
         return json.dumps(report_dict, indent=2, ensure_ascii=False)
 
     def _generate_text_report(self, reports: dict[str, ContinuityReport]) -> str:
         """テキスト形式のレポートを生成"""
-        lines = ["=" * 80]
-        lines.append("データ連続性検証レポート")
-        lines.append("=" * 80)
-        lines.append("")
+        buf = io.StringIO()
+
+        def line(text: str = "") -> None:
+            buf.write(text)
+            buf.write("\n")
+
+        line("=" * 80)
+        line("データ連続性検証レポート")
+        line("=" * 80)
+        line()
 
         total_missing = 0
         invalid_types = []
 
         for data_type, report in reports.items():
-            lines.append(f"## {data_type}")
-            lines.append(f"  期間: {report.start_year}年 - {report.end_year}年")
-            lines.append(f"  期待数: {report.expected_count}件")
-            lines.append(f"  実際: {report.actual_count}件")
+            line(f"## {data_type}")
+            line(f"  期間: {report.start_year}年 - {report.end_year}年")
+            line(f"  期待数: {report.expected_count}件")
+            line(f"  実際: {report.actual_count}件")
 
             if report.is_valid:
-                lines.append("  状態: ✅ 正常（欠損なし）")
+                line("  状態: ✅ 正常（欠損なし）")
             else:
-                lines.append(f"  状態: ❌ 欠損あり（{len(report.missing_periods)}件）")
+                line(f"  状態: ❌ 欠損あり（{len(report.missing_periods)}件）")
                 invalid_types.append(data_type)
                 total_missing += len(report.missing_periods)
 
                 # 最初の5件の欠損を表示
                 if report.missing_periods:
-                    lines.append("  欠損例:")
-                    for missing in report.missing_periods[:5]:
-                        lines.append(f"    - {missing['year']}年 {missing['period']}期")
+                    line("  欠損例:")
+                    for year, period in report.missing_periods[:5]:
+                        line(f"    - {year}年 {period}期")
                     if len(report.missing_periods) > 5:
-                        lines.append(f"    ... 他{len(report.missing_periods) - 5}件")
+                        line(f"    ... 他{len(report.missing_periods) - 5}件")
 
-            lines.append("")
+            line()
 
         # サマリー
-        lines.append("=" * 80)
-        lines.append("サマリー")
-        lines.append("=" * 80)
+        line("=" * 80)
+        line("サマリー")
+        line("=" * 80)
         if total_missing == 0:
-            lines.append("✅ すべてのデータが揃っています")
+            line("✅ すべてのデータが揃っています")
         else:
-            lines.append(f"⚠️ 合計 {total_missing} 件の欠損が見つかりました")
-            lines.append(f"影響を受けるデータタイプ: {', '.join(invalid_types)}")
+            line(f"⚠️ 合計 {total_missing} 件の欠損が見つかりました")
+            line(f"影響を受けるデータタイプ: {', '.join(invalid_types)}")
 
-        return "\n".join(lines)
+        return buf.getvalue().removesuffix("\n")
 
     def _generate_markdown_report(self, reports: dict[str, ContinuityReport]) -> str:
         """Markdown形式のレポートを生成"""
-        lines = ["# データ連続性検証レポート"]
-        lines.append("")
-        lines.append(f"実行日時: {datetime.now(self.jst).strftime('%Y-%m-%d %H:%M:%S')}")
-        lines.append("")
+        buf = io.StringIO()
+
+        def line(text: str = "") -> None:
+            buf.write(text)
+            buf.write("\n")
+
+        line("# データ連続性検証レポート")
+        line()
+        line(f"実行日時: {datetime.now(self.jst).strftime('%Y-%m-%d %H:%M:%S')}")
+        line()
 
         # サマリーテーブル
-        lines.append("## サマリー")
-        lines.append("")
-        lines.append("| データタイプ | 期間 | 期待数 | 実際 | 欠損 | 状態 |")
-        lines.append("|------------|------|--------|------|------|------|")
+        line("## サマリー")
+        line()
+        line("| データタイプ | 期間 | 期待数 | 実際 | 欠損 | 状態 |")
+        line("|------------|------|--------|------|------|------|")
 
         for data_type, report in reports.items():
             status = "✅" if report.is_valid else "❌"
             period = f"{report.start_year}-{report.end_year}"
             missing_count = len(report.missing_periods)
-            lines.append(
+            line(
                 f"| {data_type} | {period} | {report.expected_count} | {report.actual_count} | {missing_count} | {status} |"
             )
 
-        lines.append("")
+        line()
 
         # 欠損詳細
         has_missing = any(not report.is_valid for report in reports.values())
         if has_missing:
-            lines.append("## 欠損詳細")
-            lines.append("")
+            line("## 欠損詳細")
+            line()
 
             for data_type, report in reports.items():
                 if not report.is_valid:
-                    lines.append(f"### {data_type}")
-                    lines.append("")
-                    lines.append(f"- **欠損数**: {len(report.missing_periods)}件")
-                    lines.append("- **欠損期間**:")
-
-                    # 欠損を年ごとにグループ化
-                    by_year: dict[int, list[int]] = {}
-                    for missing in report.missing_periods:
-                        year = missing["year"]
-                        if year not in by_year:
-                            by_year[year] = []
-                        by_year[year].append(missing["period"])
-
-                    for year in sorted(by_year.keys()):
-                        periods = sorted(by_year[year])
+                    line(f"### {data_type}")
+                    line()
+                    line(f"- **欠損数**: {len(report.missing_periods)}件")
+                    line("- **欠損期間**:")
+
+                    for year, periods in report.by_year().items():
                         if len(periods) <= 10:
                             period_str = ", ".join(str(p) for p in periods)
                         else:
                             period_str = f"{', '.join(str(p) for p in periods[:10])}, ... (計{len(periods)}件)"
-                        lines.append(f"  - {year}年: {period_str}")
+                        line(f"  - {year}年: {period_str}")
 
-                    lines.append("")
+                    line()
 
-        return "\n".join(lines)
+        return buf.getvalue().removesuffix("\n")
 
 
 def main():
@@ -8,13 +8,19 @@
 # mypy: ignore-errors
 
 import argparse
+import codecs
 import csv
+import fnmatch
+import io
 import json
 import logging
+import os
+import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, TextIO
 
 # プロジェクトのルートディレクトリをパスに追加
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -25,8 +31,11 @@ MIN_FILE_SIZE_BYTES = 100  # 最小ファイルサイズ（バイト）
 MAX_LINE_COUNT = 1000000  # 最大行数
 MIN_LINE_COUNT = 1  # 最小行数
 EXPECTED_ENCODING = "shift_jis"  # 期待されるエンコーディング
+ENCODING_SAMPLE_BYTES = 4096  # エンコーディングチェックでデコードする先頭のバイト数
 MAX_COLUMN_COUNT = 100  # 最大カラム数
 MIN_COLUMN_COUNT = 2  # 最小カラム数
+DANGEROUS_PATTERNS = ("../", "..\\", "~", "|", "&", ";", "$", "`")  # パスに含まれてはならないパターン
+DANGEROUS_PATTERN_RE = re.compile("|".join(map(re.escape, DANGEROUS_PATTERNS)))
 
 
 def setup_logging(log_level: str = "INFO"):
@@ -52,11 +61,12 @@ class DataValidator:
         self.has_errors = False
         self.has_warnings = False
 
-    def validate_file(self, file_path: Path) -> dict[str, Any]:
+    def validate_file(self, file_path: Path, prefetched_size: int | None = None) -> dict[str, Any]:
         """ファイルを検証する
 
         Args:
             file_path: 検証するファイルのパス
+            prefetched_size: ディレクトリ走査時に取得済みのファイルサイズ（Noneの場合はstatで取得）
 
         Returns:
             検証結果の辞書
@@ -71,28 +81,27 @@ class DataValidator:
         }
 
         try:
-            # ファイル存在チェック
-            if not file_path.exists():
+            # ファイル存在チェック（走査時にサイズを取得済みの場合は存在を確認済み）
+            if prefetched_size is None and not file_path.exists():
                 result["errors"].append(f"File not found: {file_path}")
                 result["valid"] = False
                 return result
 
             # ファイルサイズチェック
-            size_result = self._check_file_size(file_path)
+            size_result = self._check_file_size(file_path, prefetched_size)
             result["checks"]["file_size"] = size_result
             if not size_result["valid"]:
                 result["errors"].extend(size_result.get("errors", []))
                 result["warnings"].extend(size_result.get("warnings", []))
 
-            # エンコーディングチェック
-            encoding_result = self._check_encoding(file_path)
+            # エンコーディングチェックとCSVフォーマットチェック（ファイルの読み込みは1回）
+            is_csv = file_path.suffix.lower() == ".csv"
+            encoding_result, csv_result = self._check_content(file_path, check_csv=is_csv)
             result["checks"]["encoding"] = encoding_result
             if not encoding_result["valid"]:
                 result["errors"].extend(encoding_result.get("errors", []))
 
-            # CSVフォーマットチェック
-            if file_path.suffix.lower() == ".csv":
-                csv_result = self._check_csv_format(file_path)
+            if is_csv:
                 result["checks"]["csv_format"] = csv_result
                 if not csv_result["valid"]:
                     result["errors"].extend(csv_result.get("errors", []))
@@ -120,12 +129,13 @@ class DataValidator:
 
         return result
 
-    def _check_file_size(self, file_path: Path) -> dict[str, Any]:
-        """ファイルサイズをチェック"""
+    def _check_file_size(self, file_path: Path, size_bytes: int | None = None) -> dict[str, Any]:
+        """ファイルサイズをチェック（size_bytesが指定された場合はstatを省略）"""
         result = {"valid": True, "errors": [], "warnings": []}
 
         try:
-            size_bytes = file_path.stat().st_size
+            if size_bytes is None:
+                size_bytes = file_path.stat().st_size
             size_mb = size_bytes / (1024 * 1024)
 
             result["size_bytes"] = size_bytes
@@ -148,70 +158,82 @@ class DataValidator:
 
     def _check_encoding(self, file_path: Path) -> dict[str, Any]:
         """エンコーディングをチェック"""
-        result = {"valid": True, "errors": []}
+        return self._check_content(file_path, check_csv=False)[0]
+
+    def _check_csv_format(self, file_path: Path) -> dict[str, Any]:
+        """CSVフォーマットをチェック"""
+        return self._check_content(file_path)[1]
+
+    def _check_content(self, file_path: Path, check_csv: bool = True) -> tuple[dict[str, Any], dict[str, Any] | None]:
+        """ファイルを1回だけ開き、エンコーディングとCSVフォーマットをまとめてチェック
+
+        Args:
+            file_path: 検証するファイルのパス
+            check_csv: CSVフォーマットもチェックするか
+
+        Returns:
+            (エンコーディングのチェック結果, CSVフォーマットのチェック結果（check_csv=Falseの場合はNone）)
+        """
+        encoding_result = {"valid": True, "errors": []}
+        csv_result = {"valid": True, "errors": [], "warnings": []} if check_csv else None
 
         try:
-            # Shift_JISで読み込みを試みる
-            with file_path.open("r", encoding=EXPECTED_ENCODING) as f:
-                # 最初の数行を読んで確認
-                for i, _line in enumerate(f):
-                    if i >= 10:  # 最初の10行のみチェック
-                        break
-                result["encoding"] = EXPECTED_ENCODING
-
-        except UnicodeDecodeError as e:
-            result["errors"].append(f"Encoding error (expected {EXPECTED_ENCODING}): {str(e)}")
-            result["valid"] = False
-        except Exception as e:
-            result["errors"].append(f"Failed to check encoding: {str(e)}")
-            result["valid"] = False
+            with file_path.open("rb") as f:
+                # 先頭のみShift_JISとしてデコードできるか確認
+                # 途中で切れたマルチバイト文字はインクリメンタルデコーダが保留するためエラーにならない
+                sample = f.read(ENCODING_SAMPLE_BYTES)
+                decoder = codecs.getincrementaldecoder(EXPECTED_ENCODING)()
+                try:
+                    decoder.decode(sample, final=len(sample) < ENCODING_SAMPLE_BYTES)
+                    encoding_result["encoding"] = EXPECTED_ENCODING
+                except UnicodeDecodeError as e:
+                    encoding_result["errors"].append(f"Encoding error (expected {EXPECTED_ENCODING}): {str(e)}")
+                    encoding_result["valid"] = False
+
+                # 開いたファイルを先頭に戻し、csv.readerで行数・カラム数を数える
+                if csv_result is not None:
+                    f.seek(0)
+                    self._check_csv_rows(io.TextIOWrapper(f, encoding=EXPECTED_ENCODING), csv_result)
 
-        return result
+        except Exception as e:
+            encoding_result["errors"].append(f"Failed to check encoding: {str(e)}")
+            encoding_result["valid"] = False
+            if csv_result is not None:
+                csv_result["errors"].append(f"Failed to check CSV format: {str(e)}")
+                csv_result["valid"] = False
 
-    def _check_csv_format(self, file_path: Path) -> dict[str, Any]:
-        """CSVフォーマットをチェック"""
-        result = {"valid": True, "errors": [], "warnings": []}
+        return encoding_result, csv_result
 
+    def _check_csv_rows(self, f: TextIO, result: dict[str, Any]):
+        """行数・カラム数を検証してCSVフォーマットのチェック結果に反映"""
         try:
-            with file_path.open("r", encoding=EXPECTED_ENCODING) as f:
-                # CSVリーダーで読み込み
-                reader = csv.reader(f)
-
-                line_count = 0
-                column_counts = set()
-                max_columns = 0
-
-                for row in reader:
-                    line_count += 1
-                    column_count = len(row)
-                    column_counts.add(column_count)
-                    max_columns = max(max_columns, column_count)
-
-                    # 行数チェック（早期終了）
-                    if line_count > MAX_LINE_COUNT:
-                        result["errors"].append(f"Too many lines: >{MAX_LINE_COUNT}")
-                        result["valid"] = False
-                        break
-
-                result["line_count"] = line_count
-                result["column_variations"] = len(column_counts)
-                result["max_columns"] = max_columns
-
-                # 検証
-                if line_count < MIN_LINE_COUNT:
-                    result["errors"].append(f"Too few lines: {line_count} (minimum: {MIN_LINE_COUNT})")
-                    result["valid"] = False
+            line_count, min_columns, max_columns = self._scan_csv_rows(f)
+            if line_count > MAX_LINE_COUNT:
+                result["errors"].append(f"Too many lines: >{MAX_LINE_COUNT}")
+                result["valid"] = False
 
-                if max_columns > MAX_COLUMN_COUNT:
-                    result["errors"].append(f"Too many columns: {max_columns} (maximum: {MAX_COLUMN_COUNT})")
-                    result["valid"] = False
-                elif max_columns < MIN_COLUMN_COUNT:
-                    result["errors"].append(f"Too few columns: {max_columns} (minimum: {MIN_COLUMN_COUNT})")
-                    result["valid"] = False
+            # カラム数の種類は数えないため、column_variationsは一貫していれば1、そうでなければ2とする
+            result["line_count"] = line_count
+            result["column_variations"] = 1 if min_columns == max_columns else 2
+            result["min_columns"] = min_columns
+            result["max_columns"] = max_columns
+
+            # 検証
+            if line_count < MIN_LINE_COUNT:
+                result["errors"].append(f"Too few lines: {line_count} (minimum: {MIN_LINE_COUNT})")
+                result["valid"] = False
 
-                # カラム数の一貫性チェック
-                if len(column_counts) > 1:
-                    result["warnings"].append(f"Inconsistent column count: {column_counts}")
+            if max_columns > MAX_COLUMN_COUNT:
+                result["errors"].append(f"Too many columns: {max_columns} (maximum: {MAX_COLUMN_COUNT})")
+                result["valid"] = False
+            elif max_columns < MIN_COLUMN_COUNT:
+                result["errors"].append(f"Too few columns: {max_columns} (minimum: {MIN_COLUMN_COUNT})")
+                result["valid"] = False
+
+            # カラム数の一貫性チェック
+            if min_columns != max_columns:
+                # 従来と同じ集合の表記で、最小・最大のカラム数を出力する
+                result["warnings"].append(f"Inconsistent column count: { {min_columns, max_columns} }")
 
         except csv.Error as e:
             result["errors"].append(f"CSV format error: {str(e)}")
@@ -220,7 +242,30 @@ class DataValidator:
             result["errors"].append(f"Failed to check CSV format: {str(e)}")
             result["valid"] = False
 
-        return result
+    def _scan_csv_rows(self, f: TextIO) -> tuple[int, int, int]:
+        """csv.readerで1行ずつ読み込み(行数, 最小カラム数, 最大カラム数)を返す"""
+        # CSVリーダーで読み込み
+        reader = csv.reader(f)
+
+        line_count = 0
+        min_columns = max_columns = 0
+
+        for row in reader:
+            line_count += 1
+            column_count = len(row)
+            # 一貫性の判定には最小・最大のみ必要なため、カラム数の集合は作らない
+            if line_count == 1:
+                min_columns = max_columns = column_count
+            elif column_count < min_columns:
+                min_columns = column_count
+            elif column_count > max_columns:
+                max_columns = column_count
+
+            # 行数チェック（早期終了）
+            if line_count > MAX_LINE_COUNT:
+                break
+
+        return line_count, min_columns, max_columns
 
     def _check_path_safety(self, file_path: Path) -> dict[str, Any]:
         """パスの安全性をチェック（パストラバーサル攻撃対策）"""
@@ -232,15 +277,15 @@ class DataValidator:
             base_path = Path.cwd() / "data"
 
             # base_path内にあることを確認
-            if not str(resolved_path).startswith(str(base_path)):
+            if not resolved_path.is_relative_to(base_path):
                 result["errors"].append(f"Path traversal detected: {resolved_path} not in {base_path}")
                 result["valid"] = False
 
             # 危険な文字のチェック
-            dangerous_patterns = ["../", "..\\", "~", "|", "&", ";", "$", "`"]
-            path_str = str(file_path)
-            for pattern in dangerous_patterns:
-                if pattern in path_str:
+            # 1回の走査で全パターンを検出し、エラーはDANGEROUS_PATTERNSの順に報告
+            found = set(DANGEROUS_PATTERN_RE.findall(str(file_path)))
+            for pattern in DANGEROUS_PATTERNS:
+                if pattern in found:
                     result["errors"].append(f"Dangerous pattern in path: {pattern}")
                     result["valid"] = False
 
@@ -266,27 +311,65 @@ class DataValidator:
             self.logger.error(f"Directory not found: {directory}")
             return results
 
-        files = list(directory.glob(pattern))
+        files, sizes = self._list_files(directory, pattern)
         self.logger.info(f"Found {len(files)} files to validate in {directory}")
 
-        for file_path in files:
-            self.logger.info(f"Validating: {file_path}")
-            result = self.validate_file(file_path)
-            results.append(result)
-            self.validation_results.append(result)
-
-            # 結果のログ出力
-            if result["valid"]:
-                self.logger.info(f"✓ Valid: {file_path}")
-            else:
-                self.logger.error(f"✗ Invalid: {file_path}")
-                for error in result["errors"]:
-                    self.logger.error(f"  - {error}")
-                for warning in result["warnings"]:
-                    self.logger.warning(f"  - {warning}")
+        if not files:
+            return results
+
+        # ファイルごとの検証は独立しているためスレッドプールで並列に実行
+        # （has_errors / has_warnings はTrueを代入するのみなのでロック不要）
+        # 結果とログはファイルの列挙順に処理する
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            validated = executor.map(self.validate_file, files, sizes)
+            for file_path, result in zip(files, validated, strict=True):
+                self._record_result(file_path, result, results)
 
         return results
 
+    def _list_files(self, directory: Path, pattern: str) -> tuple[list[Path], list[int | None]]:
+        """パターンに一致するファイルを列挙（ファイル名は大文字小文字を区別しない）
+
+        取得データには拡張子が大文字（.CSV）のファイルも含まれるため、
+        globではなくos.scandirで1回だけ走査し、小文字化したファイル名で照合する。
+        サブディレクトリを含むパターンはglobで処理する。
+
+        Returns:
+            (ファイルパスのリスト, 走査時に取得したファイルサイズのリスト（glob使用時はNone）)
+        """
+        if "/" in pattern or os.sep in pattern:
+            files = list(directory.glob(pattern))
+            return files, [None] * len(files)
+
+        lower_pattern = pattern.lower()
+        entries = []
+        with os.scandir(directory) as it:
+            for entry in it:
+                # globと同様にドットで始まるファイルはパターンが明示した場合のみ対象
+                if entry.name.startswith(".") and not pattern.startswith("."):
+                    continue
+                if fnmatch.fnmatchcase(entry.name.lower(), lower_pattern) and entry.is_file():
+                    # DirEntry.stat()の結果はキャッシュされ、以降のstat呼び出しを省ける
+                    entries.append((Path(entry.path), entry.stat().st_size))
+        entries.sort()
+        return [path for path, _ in entries], [size for _, size in entries]
+
+    def _record_result(self, file_path: Path, result: dict[str, Any], results: list[dict[str, Any]]):
+        """検証結果を記録してログに出力"""
+        results.append(result)
+        self.validation_results.append(result)
+
+        # 結果のログ出力
+        if result["valid"]:
+            self.logger.info(f"✓ Valid: {file_path}")
+        else:
+            self.logger.error(f"✗ Invalid: {file_path}")
+            for error in result["errors"]:
+                self.logger.error(f"  - {error}")
+            for warning in result["warnings"]:
+                self.logger.warning(f"  - {warning}")
+
     def generate_report(self) -> dict[str, Any]:
         """検証レポートを生成"""
         total_files = len(self.validation_results)
@@ -2,9 +2,14 @@
 東京都感染症発生動向情報システムからデータを取得する基底クラス
 """
 
-from typing import ClassVar
+import hashlib
+from collections.abc import Callable
+from typing import BinaryIO, ClassVar
+from urllib.parse import quote_plus
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 class TokyoEpidemicSurveillanceFetcher:
@@ -82,8 +87,72 @@ class TokyoEpidemicSurveillanceFetcher:
         "20": "dlwzensu.do",  # 全数報告疾病
     }
 
-    def __init__(self):
-        self.session = requests.Session()
+    # reportTypeを添字とするエンドポイントの参照表(fetch_csv_*での辞書検索を省く、未定義の番号はNone)
+    _ENDPOINT_LUT: ClassVar[tuple[str | None, ...]] = tuple(
+        map(ENDPOINT_MAP.get, map(str, range(max(map(int, ENDPOINT_MAP)) + 1)))
+    )
+
+    # 同一ホストへの接続プールの最大サイズ(並行取得時もTCP/TLS接続を再利用する)
+    POOL_MAXSIZE = 64
+
+    # レスポンス本文を読み出す単位
+    CHUNK_SIZE = 64 * 1024
+
+    # POSTするフォームのキー(この順で送信する)。キーはURLエンコード済みのテンプレートとして1回だけ組み立てる
+    FORM_KEYS = (
+        "val(reportType)",
+        "val(prefCode)",
+        "val(hcCode)",
+        "val(epidCode)",
+        "val(startYear)",
+        "val(startSubPeriod)",
+        "val(endYear)",
+        "val(endSubPeriod)",
+        "val(totalMode)",
+    )
+    FORM_TEMPLATE = "&".join(f"{quote_plus(key)}={{}}" for key in FORM_KEYS)
+    FORM_HEADERS: ClassVar[dict[str, str]] = {"Content-Type": "application/x-www-form-urlencoded"}
+
+    def __init__(self, session: requests.Session | None = None):
+        # セッションが渡された場合は呼び出し側の所有とし、closeでは閉じない
+        self._owns_session = session is None
+        self.session = session or self.create_session()
+
+        # リクエストごとに付与するヘッダー(共有セッションのヘッダーは書き換えない)
+        self.request_headers = dict(self.FORM_HEADERS)
+
+    @classmethod
+    def create_session(cls, retries: Retry | int = 0) -> requests.Session:
+        """
+        接続プールを調整したセッションを生成する
+
+        Args:
+            retries: アダプターで行うリトライの設定 (0=リトライなし)
+        """
+        session = requests.Session()
+
+        # 全リクエストが同じホスト宛てのため、プールは1つにまとめて最大接続数のみ広げる
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.POOL_MAXSIZE, pool_block=False, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def close(self):
+        """所有しているセッションを閉じて接続プールを解放する"""
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def _post_request(
         self,
@@ -97,7 +166,8 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "00",
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         共通のPOSTリクエスト処理
 
@@ -112,29 +182,56 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code: 医療圏コード (00=全て)
             epid_code: 感染症コード (週次・月次感染症コード参照)
             total_mode: 集計モード (0=合計, 1=週毎内訳)
+            sink: 指定した場合は本文をメモリに保持せず、受信したチャンクを順に書き込む
 
         Returns:
-            bytes: CSVデータ(Shift_JISエンコード)
+            tuple[bytes, str, int]: (CSVデータ(Shift_JISエンコード、sinkを指定した場合は空),
+                SHA-256ハッシュ(16進文字列), 受信したバイト数)
         """
         url = f"{self.BASE_URL}/{endpoint}"
 
-        data = {
-            "val(reportType)": report_type,
-            "val(prefCode)": pref_code,
-            "val(hcCode)": hc_code,
-            "val(epidCode)": epid_code,
-            "val(startYear)": start_year,
-            "val(startSubPeriod)": start_sub_period,
-            "val(endYear)": end_year,
-            "val(endSubPeriod)": end_sub_period,
-            "val(totalMode)": total_mode,
-        }
+        # 値のみをエンコードしてテンプレートに埋め込む(辞書の生成とキーのエンコードを省く)
+        values = (
+            report_type,
+            pref_code,
+            hc_code,
+            epid_code,
+            start_year,
+            start_sub_period,
+            end_year,
+            end_sub_period,
+            total_mode,
+        )
+        body = self.FORM_TEMPLATE.format(*map(quote_plus, values)).encode("ascii")
+
+        return self._post_request_streaming(url, body, sink)
+
+    def _post_request_streaming(self, url: str, body: bytes, sink: BinaryIO | None = None) -> tuple[bytes, str, int]:
+        """
+        レスポンス本文をチャンク単位で受信し、受信と同時にSHA-256ハッシュを計算する
+
+        Args:
+            sink: 指定した場合は本文をメモリに保持せず、チャンクを順に書き込む
+
+        Returns:
+            tuple[bytes, str, int]: (本文(sink指定時は空), SHA-256ハッシュ(16進文字列), 受信したバイト数)
+        """
+        with self.session.post(url, data=body, headers=self.request_headers, timeout=30, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(f"Request failed with status code: {response.status_code}")
 
-        response = self.session.post(url, data=data, timeout=30)
+            # 改ざん検知ではなく内容の識別用のため、usedforsecurity=Falseで最速のバックエンドを使う
+            digest = hashlib.sha256(usedforsecurity=False)
+            buf = bytearray()
+            write: Callable[[bytes], object] = buf.extend if sink is None else sink.write
+            size = 0
+            for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                digest.update(chunk)
+                write(chunk)
+                size += len(chunk)
 
-        if response.status_code == 200:
-            return response.content
-        raise Exception(f"Request failed with status code: {response.status_code}")
+        # 受信バッファから直接1回だけコピーして返す値を作る(中間のbytesを作らない)
+        return bytes(buf), digest.hexdigest(), size
 
     # ========== 定点監視 週報告分データ取得メソッド ==========
 
@@ -148,12 +245,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "00",
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 週報告分 男女別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["1"],
+            self._ENDPOINT_LUT[1],
             "1",
             start_year,
             start_sub_period,
@@ -163,6 +261,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_weekly_age(
@@ -175,12 +274,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "00",
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 週報告分 年齢階級別集計表CSVを取得する(男女別を含む)
         """
         return self._post_request(
-            self.ENDPOINT_MAP["0"],
+            self._ENDPOINT_LUT[0],
             "0",
             start_year,
             start_sub_period,
@@ -190,6 +290,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_weekly_health_center(
@@ -202,12 +303,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "",  # 保健所別は通常空文字
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 週報告分 保健所別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["2"],
+            self._ENDPOINT_LUT[2],
             "2",
             start_year,
             start_sub_period,
@@ -217,6 +319,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_weekly_medical_district(
@@ -229,12 +332,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "",  # 医療圏別は通常空文字
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 週報告分 医療圏別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["5"],
+            self._ENDPOINT_LUT[5],
             "5",
             start_year,
             start_sub_period,
@@ -244,6 +348,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     # ========== 定点監視 月報告分データ取得メソッド ==========
@@ -258,12 +363,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "00",
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 月報告分 男女別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["15"],
+            self._ENDPOINT_LUT[15],
             "15",
             start_year,
             start_sub_period,
@@ -273,6 +379,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_monthly_age(
@@ -285,12 +392,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "00",
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 月報告分 年齢階級別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["10"],
+            self._ENDPOINT_LUT[10],
             "10",
             start_year,
             start_sub_period,
@@ -300,6 +408,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_monthly_health_center(
@@ -312,12 +421,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "",  # 月次保健所別は通常空文字
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 月報告分 保健所別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["11"],
+            self._ENDPOINT_LUT[11],
             "11",
             start_year,
             start_sub_period,
@@ -327,6 +437,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     def fetch_csv_sentinel_monthly_medical_district(
@@ -339,12 +450,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "",  # 月次医療圏別は通常空文字
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         定点監視 月報告分 医療圏別集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["12"],
+            self._ENDPOINT_LUT[12],
             "12",
             start_year,
             start_sub_period,
@@ -354,6 +466,7 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
 
     # ========== 全数把握監視データ取得メソッド ==========
@@ -368,12 +481,13 @@ class TokyoEpidemicSurveillanceFetcher:
         hc_code: str = "00",
         epid_code: str = "",  # 全数報告は通常空文字
         total_mode: str = "0",
-    ) -> bytes:
+        sink: BinaryIO | None = None,
+    ) -> tuple[bytes, str, int]:
         """
         全数把握監視 週報告分 届出患者数集計表CSVを取得する
         """
         return self._post_request(
-            self.ENDPOINT_MAP["20"],
+            self._ENDPOINT_LUT[20],
             "20",
             start_year,
             start_sub_period,
@@ -383,4 +497,5 @@ class TokyoEpidemicSurveillanceFetcher:
             hc_code,
             epid_code,
             total_mode,
+            sink=sink,
         )
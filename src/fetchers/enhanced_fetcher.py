@@ -6,22 +6,78 @@ import asyncio
 import hashlib
 import logging
 import random
+import re
+import threading
 import time
 from collections.abc import Callable
 from dataclasses import dataclass
-from datetime import date, datetime
+from datetime import datetime
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
-from requests.exceptions import ConnectionError, HTTPError, Timeout
+import requests
+from requests.exceptions import ChunkedEncodingError, ConnectionError, HTTPError, Timeout
+from urllib3.util.retry import Retry
+
+from src.utils.periods import weeks_in_year
 
 from .base_fetcher import TokyoEpidemicSurveillanceFetcher
 
 # ロガー設定
 logger = logging.getLogger(__name__)
 
+# 全インスタンスで共有するセッション(リトライ設定ごとにget_shared_sessionで初回のみ生成)
+_SHARED_SESSIONS: dict[tuple[int, float], requests.Session] = {}
+_SHARED_SESSION_LOCK = threading.Lock()
+
+# アダプターでリトライするHTTPステータスコード
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# RetryHandlerでリトライする例外(本文の受信中に接続が切れた場合のChunkedEncodingErrorを含む)
+RETRYABLE_ERRORS = (Timeout, ConnectionError, HTTPError, ChunkedEncodingError)
+
+# ハッシュ関数(呼び出しごとの属性参照を省く)
+_sha256 = hashlib.sha256
+
+
+def _sha256_hex(source: bytes | Path) -> str:
+    """SHA-256ハッシュ(16進文字列)を計算（Pathの場合はファイル全体を読み込まずにチャンク単位で計算）
+
+    改ざん検知ではなく内容の識別用のため、最速のバックエンドを選べるようusedforsecurity=Falseを指定。
+    """
+    if isinstance(source, Path):
+        with source.open("rb") as f:
+            return hashlib.file_digest(f, lambda: _sha256(usedforsecurity=False)).hexdigest()
+    return _sha256(source, usedforsecurity=False).hexdigest()
+
 
-@dataclass
+def _is_body_read_error(error: Exception) -> bool:
+    """レスポンス本文の受信中に発生したエラーか判定
+
+    アダプターのリトライはレスポンスを返すまでが対象で、その後のiter_contentでの受信中のエラーは含まない。
+    アダプターが送出する例外はrequestを保持し、受信中の例外は保持しないことで区別する。
+    """
+    return isinstance(error, ChunkedEncodingError) or (
+        isinstance(error, ConnectionError | Timeout) and error.request is None
+    )
+
+
+# データタイプとレポートタイプのマッピング
+REPORT_TYPE_MAP: dict[str, str] = {
+    "sentinel_weekly_gender": "1",
+    "sentinel_weekly_age": "0",
+    "sentinel_weekly_health_center": "2",
+    "sentinel_weekly_medical_district": "5",
+    "sentinel_monthly_gender": "15",
+    "sentinel_monthly_age": "10",
+    "sentinel_monthly_health_center": "11",
+    "sentinel_monthly_medical_district": "12",
+    "notifiable_weekly": "20",
+}
+
+
+@dataclass(slots=True)
 class FetchParams:
     """データ取得パラメータ"""
 
@@ -37,7 +93,7 @@ class FetchParams:
     total_mode: str = "0"
 
 
-@dataclass
+@dataclass(slots=True)
 class FileMetadata:
     """ファイルメタデータ"""
 
@@ -51,7 +107,7 @@ class FileMetadata:
     fetch_params: FetchParams | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FetchResult:
     """データ取得結果"""
 
@@ -63,7 +119,7 @@ class FetchResult:
     fetch_time: float | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class DataFetcherConfig:
     """フェッチャー設定"""
 
@@ -72,6 +128,7 @@ class DataFetcherConfig:
     max_delay: float = 60.0
     timeout: int = 30
     rate_limit_delay: float = 1.0
+    concurrency: int = 4  # fetch_date_rangeで同時に取得する期間数
     enable_jitter: bool = True
     user_agent: str = "TokyoEpidemicDataFetcher/1.0 (GitHub Actions Automation)"
 
@@ -79,8 +136,14 @@ class DataFetcherConfig:
 class RetryHandler:
     """リトライハンドラー"""
 
-    def __init__(self, config: DataFetcherConfig):
+    def __init__(self, config: DataFetcherConfig, retry_if: Callable[[Exception], bool] | None = None):
+        """
+        Args:
+            config: フェッチャー設定
+            retry_if: 指定した場合、Trueを返す例外のみリトライする（アダプターでリトライ済みの例外を除くため）
+        """
         self.config = config
+        self.retry_if = retry_if
 
     def calculate_delay(self, attempt: int) -> float:
         """指数バックオフによる遅延時間の計算"""
@@ -92,6 +155,13 @@ class RetryHandler:
 
         return delay
 
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """失敗した試行の次に待つ時間を計算"""
+        if isinstance(error, HTTPError) and error.response.status_code == 429:
+            # レート制限エラーの場合は長めに待つ
+            return self.calculate_delay(attempt + 1) * 2
+        return self.calculate_delay(attempt)
+
     async def execute_with_retry(self, func: Callable, *args, **kwargs) -> Any:
         """リトライ機能付き実行"""
         last_error = None
@@ -100,18 +170,44 @@ class RetryHandler:
             try:
                 return await func(*args, **kwargs)
 
-            except (Timeout, ConnectionError, HTTPError) as e:
+            except RETRYABLE_ERRORS as e:
+                if self.retry_if is not None and not self.retry_if(e):
+                    raise
                 last_error = e
+                delay = self._retry_delay(e, attempt)
 
-                if isinstance(e, HTTPError) and e.response.status_code == 429:
-                    # レート制限エラーの場合は長めに待つ
-                    delay = self.calculate_delay(attempt + 1) * 2
+                if attempt < self.config.max_retries:
+                    logger.warning(f"Attempt {attempt + 1} failed: {e}. " f"Retrying in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
                 else:
-                    delay = self.calculate_delay(attempt)
+                    logger.error(f"Max retries exceeded. Last error: {e}")
+                    raise
+
+            except (ValueError, OSError):
+                logger.exception("Unexpected error during retry")
+                raise
+
+        if last_error:
+            raise last_error
+        return None
+
+    def execute_sync_with_retry(self, func: Callable, *args, **kwargs) -> Any:
+        """リトライ機能付き実行（同期版）"""
+        last_error = None
+
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                return func(*args, **kwargs)
+
+            except RETRYABLE_ERRORS as e:
+                if self.retry_if is not None and not self.retry_if(e):
+                    raise
+                last_error = e
+                delay = self._retry_delay(e, attempt)
 
                 if attempt < self.config.max_retries:
                     logger.warning(f"Attempt {attempt + 1} failed: {e}. " f"Retrying in {delay:.1f} seconds...")
-                    await asyncio.sleep(delay)
+                    time.sleep(delay)
                 else:
                     logger.error(f"Max retries exceeded. Last error: {e}")
                     raise
@@ -126,31 +222,53 @@ class RetryHandler:
 
 
 class RateLimiter:
-    """レート制限管理"""
+    """レート制限管理（リクエスト間隔をmin_delay以上に保つトークンバケット）
+
+    並行するコルーチン・スレッドが同じ枠を取り合わないよう、送信可能時刻の予約をロック内で行い、
+    待機はロックの外で行う。
+    """
 
     def __init__(self, min_delay: float = 1.0):
         self.min_delay = min_delay
-        self.last_request_time = 0
+        self._next_slot = float("-inf")
+        self._lock = threading.Lock()
+
+    def _reserve(self) -> float:
+        """次の送信枠を予約し、その枠までの待ち時間を返す"""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_delay
+        return slot - now
 
     async def wait_if_needed(self):
         """必要に応じて待機"""
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self.min_delay:
-            await asyncio.sleep(self.min_delay - elapsed)
-        self.last_request_time = time.time()
+        delay = self._reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def wait_if_needed_sync(self):
+        """必要に応じて待機（同期版）"""
+        delay = self._reserve()
+        if delay > 0:
+            time.sleep(delay)
 
 
 class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
     """拡張版感染症データフェッチャー"""
 
-    def __init__(self, config: DataFetcherConfig | None = None):
-        super().__init__()
+    def __init__(self, config: DataFetcherConfig | None = None, session: requests.Session | None = None):
         self.config = config or DataFetcherConfig()
-        self.retry_handler = RetryHandler(self.config)
+
+        # セッションが渡されない場合は全インスタンスで共有するセッションを使い、接続を再利用する
+        # 共有セッションはアダプターでリトライするため、Python側では本文の受信中のエラーのみリトライする
+        self._adapter_retries = session is None
+        super().__init__(session or self.get_shared_session(self.config))
+        self.retry_handler = RetryHandler(self.config, retry_if=_is_body_read_error if self._adapter_retries else None)
         self.rate_limiter = RateLimiter(self.config.rate_limit_delay)
 
-        # セッション設定のカスタマイズ
-        self.session.headers.update({"User-Agent": self.config.user_agent})
+        # セッションは共有されるため、User-Agentはリクエスト単位で付与
+        self.request_headers["User-Agent"] = self.config.user_agent
 
         # データタイプとフェッチメソッドのマッピング
         self.fetch_methods = {
@@ -165,9 +283,39 @@ class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
             "notifiable_weekly": self.fetch_csv_notifiable_weekly,
         }
 
-    async def fetch_with_retry_async(self, fetch_method: Callable, **params) -> FetchResult:
-        """非同期リトライ機能付きデータ取得"""
-        start_time = time.time()
+    @classmethod
+    def get_shared_session(cls, config: DataFetcherConfig | None = None) -> requests.Session:
+        """全インスタンスで共有するセッションを取得(リトライ設定ごとに初回呼び出し時に生成)"""
+        config = config or DataFetcherConfig()
+        key = (config.max_retries, config.base_delay)
+        with _SHARED_SESSION_LOCK:
+            session = _SHARED_SESSIONS.get(key)
+            if session is None:
+                session = _SHARED_SESSIONS[key] = cls.create_session(cls.build_retry(config))
+            return session
+
+    @staticmethod
+    def build_retry(config: DataFetcherConfig) -> Retry:
+        """設定からアダプター用のリトライ設定を生成(429はRetry-Afterヘッダーに従って待機)"""
+        return Retry(
+            total=config.max_retries,
+            backoff_factor=config.base_delay,
+            status_forcelist=RETRY_STATUS_CODES,
+            allowed_methods=frozenset({"POST"}),
+            respect_retry_after_header=True,
+            # リトライ後も失敗した場合は最後のレスポンスを返し、ステータスコードのエラーとして扱う
+            raise_on_status=False,
+        )
+
+    async def fetch_with_retry_async(
+        self, fetch_method: Callable, sink_path: Path | None = None, **params
+    ) -> FetchResult:
+        """非同期リトライ機能付きデータ取得
+
+        sink_pathを指定した場合は本文をメモリに保持せずにファイルへ書き込み、結果のdataはNoneとなる
+        （ハッシュとサイズはメタデータに格納）。
+        """
+        start_time = time.monotonic()
         retry_count = 0
 
         # data_typeとreport_typeを分離（メタデータ用）
@@ -178,92 +326,183 @@ class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
             nonlocal retry_count
             await self.rate_limiter.wait_if_needed()
             retry_count += 1
-            return fetch_method(**params)
+            # 同期のHTTP通信はスレッドで実行し、イベントループを塞がずに他の取得と並行させる
+            return await asyncio.to_thread(self._call_fetch_method, fetch_method, params, sink_path)
 
         try:
-            data = await self.retry_handler.execute_with_retry(_fetch)
+            data, sha256_hash, size = await self.retry_handler.execute_with_retry(_fetch)
+            return self._build_result(
+                data, sha256_hash, size, params, data_type, report_type, retry_count, start_time, sink_path
+            )
 
-            # メタデータ用のパラメータを復元
-            metadata_params = dict(params)
-            if data_type:
-                metadata_params["data_type"] = data_type
-            if report_type:
-                metadata_params["report_type"] = report_type
+        except (HTTPError, Timeout, ConnectionError, ValueError, OSError) as e:
+            logger.exception("Failed to fetch data")
+            return FetchResult(
+                success=False, error=e, retry_count=retry_count, fetch_time=time.monotonic() - start_time
+            )
+        except Exception as e:
+            # その他の予期しない例外もキャッチして処理
+            logger.exception("Unexpected error during fetch")
+            return FetchResult(
+                success=False, error=e, retry_count=retry_count, fetch_time=time.monotonic() - start_time
+            )
 
-            # メタデータの生成
-            metadata = self._create_metadata(data, metadata_params)
+    def fetch_with_retry_sync(self, fetch_method: Callable, sink_path: Path | None = None, **params) -> FetchResult:
+        """同期版リトライ機能付きデータ取得（イベントループを使わずに取得）"""
+        start_time = time.monotonic()
+        retry_count = 0
 
-            return FetchResult(
-                success=True, data=data, metadata=metadata, retry_count=retry_count, fetch_time=time.time() - start_time
+        # data_typeとreport_typeを分離（メタデータ用）
+        data_type = params.pop("data_type", None)
+        report_type = params.pop("report_type", None)
+
+        def _fetch():
+            nonlocal retry_count
+            self.rate_limiter.wait_if_needed_sync()
+            retry_count += 1
+            return self._call_fetch_method(fetch_method, params, sink_path)
+
+        try:
+            data, sha256_hash, size = self.retry_handler.execute_sync_with_retry(_fetch)
+            return self._build_result(
+                data, sha256_hash, size, params, data_type, report_type, retry_count, start_time, sink_path
             )
 
         except (HTTPError, Timeout, ConnectionError, ValueError, OSError) as e:
             logger.exception("Failed to fetch data")
-            return FetchResult(success=False, error=e, retry_count=retry_count, fetch_time=time.time() - start_time)
+            return FetchResult(
+                success=False, error=e, retry_count=retry_count, fetch_time=time.monotonic() - start_time
+            )
         except Exception as e:
             # その他の予期しない例外もキャッチして処理
             logger.exception("Unexpected error during fetch")
-            return FetchResult(success=False, error=e, retry_count=retry_count, fetch_time=time.time() - start_time)
+            return FetchResult(
+                success=False, error=e, retry_count=retry_count, fetch_time=time.monotonic() - start_time
+            )
 
-    def fetch_with_retry(self, fetch_method: Callable, **params) -> FetchResult:
+    def fetch_with_retry(self, fetch_method: Callable, sink_path: Path | None = None, **params) -> FetchResult:
         """同期版リトライ機能付きデータ取得"""
-        loop = asyncio.new_event_loop()
-        try:
-            return loop.run_until_complete(self.fetch_with_retry_async(fetch_method, **params))
-        finally:
-            loop.close()
+        return self.fetch_with_retry_sync(fetch_method, sink_path, **params)
 
-    def fetch_date_range(
+    def _call_fetch_method(
+        self, fetch_method: Callable, params: dict[str, Any], sink_path: Path | None
+    ) -> tuple[bytes, str, int]:
+        """フェッチメソッドを呼び出し、(本文, SHA-256ハッシュ, 受信したバイト数)を返す
+
+        sink_path指定時は本文をファイルへ直接書き込み、返す本文は空となる。
+        """
+        if sink_path is None:
+            return fetch_method(**params)
+
+        # リトライ時は先頭から書き直す
+        with sink_path.open("wb") as sink:
+            return fetch_method(**params, sink=sink)
+
+    def _build_result(
+        self,
+        data: bytes,
+        sha256_hash: str,
+        size: int,
+        params: dict[str, Any],
+        data_type: str | None,
+        report_type: str | None,
+        retry_count: int,
+        start_time: float,
+        sink_path: Path | None = None,
+    ) -> FetchResult:
+        """取得成功時の結果を生成"""
+        # メタデータ用のパラメータを復元
+        metadata_params = dict(params)
+        if data_type:
+            metadata_params["data_type"] = data_type
+        if report_type:
+            metadata_params["report_type"] = report_type
+
+        # メタデータの生成(受信時に計算したハッシュとサイズを使い、本文を再計算しない)
+        metadata = self._create_metadata(data, metadata_params, sha256_hash, size)
+
+        return FetchResult(
+            success=True,
+            # ファイルへ書き込んだ場合、本文は結果に含めない
+            data=data if sink_path is None else None,
+            metadata=metadata,
+            retry_count=retry_count,
+            fetch_time=time.monotonic() - start_time,
+        )
+
+    async def fetch_date_range_async(
         self,
         data_type: str,
         start_date: tuple[int, int],
         end_date: tuple[int, int],
         **kwargs,  # (year, week/month)
     ) -> list[FetchResult]:
-        """日付範囲での一括取得"""
-        results = []
+        """日付範囲での一括取得（同時実行数を制限しながら並行取得）"""
         fetch_method = self.fetch_methods.get(data_type)
 
         if not fetch_method:
             raise ValueError(f"Unknown data type: {data_type}")
 
-        # 期間内の全てのデータを取得
-        current_year = start_date[0]
-        current_period = start_date[1]
-
-        while (current_year, current_period) <= end_date:
-            params = {
-                "start_year": str(current_year),
-                "start_sub_period": str(current_period),
-                "end_year": str(current_year),
-                "end_sub_period": str(current_period),
-                "data_type": data_type,
-                "report_type": self._get_report_type(data_type),
-                **kwargs,
-            }
-
-            result = self.fetch_with_retry(fetch_method, **params)
-            results.append(result)
-
-            # 次の期間へ
-            if "monthly" in data_type:
-                current_period += 1
-                if current_period > 12:
-                    current_period = 1
-                    current_year += 1
-            else:  # weekly
-                max_weeks = self._get_weeks_in_year(current_year)
-                current_period += 1
-                if current_period > max_weeks:
-                    current_period = 1
-                    current_year += 1
-
-            # レート制限を考慮
-            time.sleep(self.config.rate_limit_delay)
-
-        return results
-
-    def get_missing_data(  # noqa: PLR0912
+        report_type = self._get_report_type(data_type)
+        semaphore = asyncio.Semaphore(self.config.concurrency)
+
+        async def _fetch_one(params: dict[str, Any]) -> FetchResult:
+            async with semaphore:
+                # HTTP通信はスレッドで実行し、接続プールを共有するセッションで並行に取得
+                result = await asyncio.to_thread(self.fetch_with_retry, fetch_method, **params)
+
+                # レート制限を考慮
+                await asyncio.sleep(self.config.rate_limit_delay)
+            return result
+
+        # 期間ごとのパラメータを先に生成（年・期間の文字列は1回だけ変換し、開始と終了で共有）
+        params_list = []
+        year, year_str = None, ""
+        for current_year, period in self._iter_periods(data_type, start_date, end_date):
+            if current_year != year:
+                year, year_str = current_year, str(current_year)
+            period_str = str(period)
+            params_list.append(
+                {
+                    "start_year": year_str,
+                    "start_sub_period": period_str,
+                    "end_year": year_str,
+                    "end_sub_period": period_str,
+                    "data_type": data_type,
+                    "report_type": report_type,
+                    **kwargs,
+                }
+            )
+
+        # 期間内の全てのデータを取得（結果は期間順）
+        return list(await asyncio.gather(*map(_fetch_one, params_list)))
+
+    def fetch_date_range(
+        self,
+        data_type: str,
+        start_date: tuple[int, int],
+        end_date: tuple[int, int],
+        **kwargs,  # (year, week/month)
+    ) -> list[FetchResult]:
+        """日付範囲での一括取得"""
+        return asyncio.run(self.fetch_date_range_async(data_type, start_date, end_date, **kwargs))
+
+    def _iter_periods(self, data_type: str, start_date: tuple[int, int], end_date: tuple[int, int]):
+        """開始から終了までの(年, 週/月)を順に列挙"""
+        current = start_date
+
+        while current <= end_date:
+            yield current
+            current = self._next_period(data_type, *current)
+
+    def _next_period(self, data_type: str, year: int, period: int) -> tuple[int, int]:
+        """次の(年, 週/月)を取得"""
+        max_period = 12 if "monthly" in data_type else self._get_weeks_in_year(year)
+        if period >= max_period:
+            return year + 1, 1
+        return year, period + 1
+
+    def get_missing_data(
         self,
         data_type: str,
         existing_files: list[Path],
@@ -303,66 +542,86 @@ class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
                     f"無効な月番号が指定されました: {invalid_months}。月番号は1-12の範囲である必要があります。"
                 )
 
+        # 現在日時は1回だけ取得
+        now = datetime.now()
+        current_year, current_month, current_week = now.year, now.month, now.isocalendar()[1]
+
         if end_year is None:
-            end_year = datetime.now().year
-
-        existing_params = self._parse_existing_files(existing_files, data_type)
-        missing_params = []
-
-        for year in range(start_year, end_year + 1):
-            if "monthly" in data_type:
-                max_period = 12 if year < datetime.now().year else datetime.now().month
-                for month in range(1, max_period + 1):
-                    # 対象月が指定されている場合はフィルタリング
-                    if target_months is not None and month not in target_months:
-                        continue
-                    params = FetchParams(
-                        start_year=str(year),
-                        start_sub_period=str(month),
-                        end_year=str(year),
-                        end_sub_period=str(month),
-                        data_type=data_type,
-                        report_type=self._get_report_type(data_type),
-                    )
-                    if not self._is_params_in_existing(params, existing_params):
-                        missing_params.append(params)
-            else:  # weekly
-                max_period = self._get_weeks_in_year(year)
-                if year == datetime.now().year:
-                    max_period = min(max_period, datetime.now().isocalendar()[1])
-
-                for week in range(1, max_period + 1):
-                    # 対象週が指定されている場合はフィルタリング
-                    if target_weeks is not None and week not in target_weeks:
-                        continue
-                    params = FetchParams(
-                        start_year=str(year),
-                        start_sub_period=str(week),
-                        end_year=str(year),
-                        end_sub_period=str(week),
-                        data_type=data_type,
-                        report_type=self._get_report_type(data_type),
-                    )
-                    if not self._is_params_in_existing(params, existing_params):
-                        missing_params.append(params)
-
-        return missing_params
-
-    def _create_metadata(self, data: bytes, params: dict[str, Any]) -> FileMetadata:
-        """メタデータの生成"""
+            end_year = current_year
+
+        # 既存データは(年, 期間)の集合で保持し、候補ごとの判定をO(1)にする
+        existing_keys = {
+            (params.start_year, params.start_sub_period)
+            for params in self._parse_existing_files(existing_files, data_type)
+        }
+        report_type = self._get_report_type(data_type)
+        years = range(start_year, end_year + 1)
+
+        # 年ごとの最大期間（当年は現在の週/月まで）
+        if "monthly" in data_type:
+            targets = target_months
+            year_limits = ((year, 12 if year < current_year else current_month) for year in years)
+        else:  # weekly
+            targets = target_weeks
+            year_limits = (
+                (year, min(weeks, current_week) if year == current_year else weeks)
+                for year, weeks in ((year, self._get_weeks_in_year(year)) for year in years)
+            )
+
+        # 候補は(年, 期間)の文字列キーのみで列挙し、対象週/月が指定されている場合はフィルタリング
+        target_set = None if targets is None else set(targets)
+        period_strs = [str(period) for period in range(54)]
+        candidates = (
+            (year_str, period_strs[period])
+            for year_str, max_period in ((str(year), max_period) for year, max_period in year_limits)
+            for period in range(1, max_period + 1)
+            if target_set is None or period in target_set
+        )
+
+        # FetchParamsは欠損している期間に対してのみ生成
+        return [
+            FetchParams(
+                start_year=year,
+                start_sub_period=period,
+                end_year=year,
+                end_sub_period=period,
+                data_type=data_type,
+                report_type=report_type,
+            )
+            for year, period in candidates
+            if (year, period) not in existing_keys
+        ]
+
+    def _create_metadata(
+        self,
+        data: bytes | Path,
+        params: dict[str, Any],
+        sha256_hash: str | None = None,
+        file_size: int | None = None,
+    ) -> FileMetadata:
+        """メタデータの生成
+
+        dataにはCSVデータ、または書き込み済みのファイルのパスを渡す。
+        sha256_hash・file_sizeが渡された場合はdataから計算しない。
+        """
         timestamp = datetime.now()
-        data_hash = hashlib.sha256(data).hexdigest()
+        data_hash = _sha256_hex(data) if sha256_hash is None else sha256_hash
+        if file_size is None:
+            file_size = data.stat().st_size if isinstance(data, Path) else len(data)
 
         # データタイプの推定
         data_type = params.get("data_type", "unknown")
 
         # 日付範囲の文字列化
-        date_range = f"{params.get('start_year', '')}{params.get('start_sub_period', '')}"
-        if params.get("end_sub_period") != params.get("start_sub_period"):
-            date_range += f"-{params.get('end_sub_period', '')}"
+        start_sub_period = params.get("start_sub_period")
+        end_sub_period = params.get("end_sub_period")
+        date_range = f"{params.get('start_year', '')}{start_sub_period or ''}"
+        if end_sub_period != start_sub_period:
+            date_range += f"-{end_sub_period or ''}"
 
-        # ファイル名の生成
-        filename = f"{data_type}_{date_range}_{timestamp.strftime('%Y%m%d_%H%M%S')}.csv"
+        # ファイル名の生成(strftimeを使わずに日時の各要素から直接整形)
+        stamp = "%04d%02d%02d_%02d%02d%02d" % timestamp.timetuple()[:6]  # noqa: UP031
+        filename = f"{data_type}_{date_range}_{stamp}.csv"
 
         # FetchParamsの作成（必須フィールドがある場合のみ）
         fetch_params = None
@@ -374,29 +633,33 @@ class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
             data_type=data_type,
             date_range=date_range,
             timestamp=timestamp,
-            file_size=len(data),
+            file_size=file_size,
             sha256_hash=data_hash,
             fetch_params=fetch_params,
         )
 
-    def _get_weeks_in_year(self, year: int) -> int:
+    @staticmethod
+    def _get_weeks_in_year(year: int) -> int:
         """指定年の週数を取得"""
-        return date(year, 12, 28).isocalendar()[1]
+        return weeks_in_year(year)
 
     def _get_report_type(self, data_type: str) -> str:
         """データタイプからレポートタイプを取得"""
-        report_type_map = {
-            "sentinel_weekly_gender": "1",
-            "sentinel_weekly_age": "0",
-            "sentinel_weekly_health_center": "2",
-            "sentinel_weekly_medical_district": "5",
-            "sentinel_monthly_gender": "15",
-            "sentinel_monthly_age": "10",
-            "sentinel_monthly_health_center": "11",
-            "sentinel_monthly_medical_district": "12",
-            "notifiable_weekly": "20",
-        }
-        return report_type_map.get(data_type, "0")
+        return REPORT_TYPE_MAP.get(data_type, "0")
+
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _filename_regex(data_type: str) -> re.Pattern[str]:
+        """データタイプごとの既存ファイル名(拡張子を除く)の正規表現を取得
+
+        新形式は year/period、旧形式は old_year/old_period のグループに年と期間が入る。
+        """
+        return re.compile(
+            rf"{re.escape(data_type)}_"
+            r"(?:(?P<year>\d+)_(?P<period>\d*)"
+            r"|(?:.*_)?(?P<old_year>\d+)_(?P<old_period>\d+)_[^_]*_[^_]*)",
+            re.ASCII | re.DOTALL,
+        )
 
     def _parse_existing_files(self, files: list[Path], data_type: str) -> list[FetchParams]:
         """既存ファイルからパラメータを解析
@@ -405,58 +668,35 @@ class EnhancedEpidemicDataFetcher(TokyoEpidemicSurveillanceFetcher):
         - 新形式: sentinel_weekly_gender_2025_01.csv
         - 旧形式: sentinel_weekly_gender_2025_1_20250101_120000.csv
         """
+        pattern = self._filename_regex(data_type)
+        report_type = self._get_report_type(data_type)
         params_list = []
 
         for file in files:
-            # より厳密なマッチング: データタイプで始まり、アンダースコアが続くことを確認
-            if file.name.startswith(f"{data_type}_"):
-                parts = file.stem.split("_")
-
-                try:
-                    # データタイプの要素数を計算（例: sentinel_weekly_gender → 3要素）
-                    data_type_parts = len(data_type.split("_"))
-
-                    # 新形式の場合（data_type + year + period）
-                    if len(parts) == data_type_parts + 2:
-                        year = parts[-2]
-                        period = parts[-1].lstrip("0") or "0"  # ゼロパディング除去
-                    # 旧形式の場合（data_type + year + period + timestamp）
-                    elif len(parts) >= 5:
-                        year = parts[-4]
-                        period = parts[-3]
-                    else:
-                        continue
-
-                    # 年と期間の妥当性チェック
-                    if not year.isdigit() or not period.isdigit():
-                        continue
-
-                    # 年の範囲チェック（1900-2100年）
-                    year_int = int(year)
-                    if year_int < 1900 or year_int > 2100:
-                        continue
-
-                    params = FetchParams(
-                        start_year=year,
-                        start_sub_period=period,
-                        end_year=year,
-                        end_sub_period=period,
-                        data_type=data_type,
-                        report_type=self._get_report_type(data_type),
-                    )
-                    params_list.append(params)
-                except (IndexError, ValueError):
-                    continue
+            # データタイプで始まり、アンダースコアが続くファイル名のみを1回の照合で解析
+            m = pattern.fullmatch(file.stem)
+            if not m:
+                continue
+
+            year, period = m.group("year", "period")
+            if year is not None:
+                period = period.lstrip("0") or "0"  # ゼロパディング除去
+            else:
+                year, period = m.group("old_year", "old_period")
+
+            # 年の範囲チェック（1900-2100年）
+            if not 1900 <= int(year) <= 2100:
+                continue
+
+            params_list.append(
+                FetchParams(
+                    start_year=year,
+                    start_sub_period=period,
+                    end_year=year,
+                    end_sub_period=period,
+                    data_type=data_type,
+                    report_type=report_type,
+                )
+            )
 
         return params_list
-
-    def _is_params_in_existing(self, params: FetchParams, existing_params: list[FetchParams]) -> bool:
-        """パラメータが既存リストに含まれるか確認"""
-        for existing in existing_params:
-            if (
-                params.start_year == existing.start_year
-                and params.start_sub_period == existing.start_sub_period
-                and params.data_type == existing.data_type
-            ):
-                return True
-        return False
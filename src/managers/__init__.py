@@ -2,7 +2,35 @@
 Manager modules for data collection system
 """
 
-from .config_manager import ConfigurationManager, DataCollectionConfig
-from .storage_manager import CommitResult, SaveResult, StorageManager
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .config_manager import ConfigurationManager, DataCollectionConfig
+    from .storage_manager import CommitResult, SaveResult, StorageManager
+
+# 公開名と定義モジュールの対応(参照されたときに初めてモジュールを読み込む)
+_LAZY_ATTRS = {
+    "ConfigurationManager": ".config_manager",
+    "DataCollectionConfig": ".config_manager",
+    "CommitResult": ".storage_manager",
+    "SaveResult": ".storage_manager",
+    "StorageManager": ".storage_manager",
+}
 
 __all__ = ["CommitResult", "ConfigurationManager", "DataCollectionConfig", "SaveResult", "StorageManager"]
+
+
+def __getattr__(name: str):
+    module_name = _LAZY_ATTRS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    value = getattr(import_module(module_name, __name__), name)
+    # 2回目以降はモジュール属性として直接参照させる
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -3,13 +3,13 @@
 """
 
 import logging
-from dataclasses import dataclass, field
+from collections.abc import Callable
+from dataclasses import dataclass, field, fields
 from datetime import datetime
+from functools import cache, lru_cache
 from pathlib import Path
 from typing import Any
 
-import yaml
-
 logger = logging.getLogger(__name__)
 
 
@@ -40,7 +40,6 @@ class StorageConfig:
     base_directory: str = "data/raw"
     processed_directory: str = "data/processed"
     log_directory: str = "data/logs"
-    directory_structure: str = "{year}/{month}/week_{week}"  # or "{year}/{month}"
     auto_commit: bool = True
     commit_message_template: str = "データ更新: {data_type} - {date_range}"
     keep_shift_jis: bool = True  # Shift_JISエンコーディングを維持
@@ -74,6 +73,7 @@ class CollectionConfig:
 
     incremental_mode: bool = True  # 増分収集モード
     batch_size: int = 50  # 一度に処理するファイル数
+    concurrency: int = 4  # バッチ内で同時に取得するファイル数
     start_year: int = 2000
     end_year: int | None = None  # Noneの場合は現在年
     data_types_to_collect: list[str] = field(
@@ -105,17 +105,83 @@ class DataCollectionConfig:
     data_types: list[DataTypeConfig] = field(default_factory=list)
 
 
+# 設定ファイルのセクション名と対応するデータクラス
+_SECTIONS: dict[str, type] = {
+    "schedule": ScheduleConfig,
+    "collection": CollectionConfig,
+    "storage": StorageConfig,
+    "quality": QualityConfig,
+    "notifications": NotificationConfig,
+}
+
+# 設定ファイルのキー名とデータクラスのフィールド名が異なるもの
+_FIELD_ALIASES: dict[type, dict[str, str]] = {
+    ScheduleConfig: {"cron": "cron_expression"},
+    CollectionConfig: {"data_types": "data_types_to_collect"},
+}
+
+
+@cache
+def _key_map(cls: type) -> dict[str, str]:
+    """設定ファイルのキー名からフィールド名への対応を取得（クラスごとに一度だけ構築）"""
+    aliases = {name: key for key, name in _FIELD_ALIASES.get(cls, {}).items()}
+    return {aliases.get(f.name, f.name): f.name for f in fields(cls)}
+
+
+def _from_dict(cls: type, values: dict[str, Any]) -> Any:
+    """辞書からデータクラスを生成（未指定の項目はデータクラスの既定値、未知のキーは無視）"""
+    key_map = _key_map(cls)
+    return cls(**{key_map[key]: value for key, value in values.items() if key in key_map})
+
+
+@cache
+def _dict_encoder(cls: type) -> Callable[[Any], dict[str, Any]]:
+    """データクラスを辞書に変換する関数をクラスごとに生成
+
+    dataclasses自体と同様にフィールド名から関数のソースを組み立てて一度だけコンパイルし、
+    変換時のフィールド走査やgetattrを省く。
+    """
+    items = ", ".join(f"{key!r}: obj.{name}" for key, name in _key_map(cls).items())
+    namespace: dict[str, Any] = {}
+    exec(f"def _to_dict_{cls.__name__}(obj):\n    return {{{items}}}\n", namespace)
+    return namespace[f"_to_dict_{cls.__name__}"]
+
+
+def _to_dict(obj: Any) -> dict[str, Any]:
+    """データクラスを設定ファイルのキー名の辞書に変換"""
+    # cacheの引数はHashableとして型検査されるため、type[Any]ではなくtypeとして渡す
+    cls: type = type(obj)
+    return _dict_encoder(cls)(obj)
+
+
+@lru_cache(maxsize=1)
+def _yaml_safe_codecs() -> tuple[type, type]:
+    """YAMLのセーフローダー/ダンパーを取得（libyamlが利用可能ならC実装を使用する）
+
+    データクラスだけを使う場合に読み込みコストがかからないよう、yamlは初回使用時に読み込む。
+    """
+    import yaml
+
+    try:
+        return yaml.CSafeLoader, yaml.CSafeDumper
+    except AttributeError:
+        return yaml.SafeLoader, yaml.SafeDumper
+
+
 class ValidationResult:
     """設定検証結果"""
 
     def __init__(self):
-        self.is_valid = True
         self.errors = []
         self.warnings = []
 
+    @property
+    def is_valid(self) -> bool:
+        """エラーが1件もなければ有効"""
+        return not self.errors
+
     def add_error(self, message: str):
         self.errors.append(message)
-        self.is_valid = False
 
     def add_warning(self, message: str):
         self.warnings.append(message)
@@ -131,7 +197,11 @@ class ConfigurationManager:
         self.config: DataCollectionConfig | None = None
 
     def load_config(self, config_path: Path | None = None) -> DataCollectionConfig:
-        """設定ファイルの読み込みと検証"""
+        """設定ファイルの読み込みと検証
+
+        同じファイルが変更されていなければ(パス・更新時刻・サイズが同じ)、
+        前回読み込んで検証した設定オブジェクトをそのまま返す。
+        """
         config_path = config_path or self.config_path
 
         if not config_path.exists():
@@ -139,14 +209,23 @@ class ConfigurationManager:
             self.config = self._get_default_config()
             return self.config
 
+        st = config_path.stat()
+        self.config = _load_config_cached(str(config_path.absolute()), st.st_mtime_ns, st.st_size)
+        return self.config
+
+    def _load_config_file(self, config_path: Path) -> DataCollectionConfig:
+        """設定ファイルを読み込んで解析・検証する（キャッシュなし）"""
+        import yaml
+
+        safe_loader, _ = _yaml_safe_codecs()
         try:
             with open(config_path, encoding="utf-8") as f:
-                config_dict = yaml.safe_load(f) or {}
+                config_dict = yaml.load(f, Loader=safe_loader) or {}
 
-            self.config = self._parse_config(config_dict)
+            config = self._parse_config(config_dict)
 
             # 設定の検証
-            validation_result = self.validate_config(self.config)
+            validation_result = self.validate_config(config)
             if not validation_result.is_valid:
                 for error in validation_result.errors:
                     logger.error(f"Config validation error: {error}")
@@ -155,7 +234,7 @@ class ConfigurationManager:
             for warning in validation_result.warnings:
                 logger.warning(f"Config warning: {warning}")
 
-            return self.config
+            return config
 
         except Exception as e:
             logger.error(f"Failed to load config: {e}")
@@ -177,6 +256,9 @@ class ConfigurationManager:
         if config.collection.batch_size < 1:
             result.add_error("Batch size must be at least 1")
 
+        if config.collection.concurrency < 1:
+            result.add_error("Concurrency must be at least 1")
+
         if config.collection.start_year < 2000:
             result.add_warning("Start year is before 2000, data may not be available")
 
@@ -204,89 +286,14 @@ class ConfigurationManager:
         """辞書から設定オブジェクトへの変換"""
         config = DataCollectionConfig()
 
-        # スケジュール設定
-        if "schedule" in config_dict:
-            schedule = config_dict["schedule"]
-            config.schedule = ScheduleConfig(
-                cron_expression=schedule.get("cron", "0 2 * * 1"),
-                timezone=schedule.get("timezone", "Asia/Tokyo"),
-                manual_trigger_enabled=schedule.get("manual_trigger_enabled", True),
-            )
-
-        # 収集設定
-        if "collection" in config_dict:
-            collection = config_dict["collection"]
-            config.collection = CollectionConfig(
-                incremental_mode=collection.get("incremental_mode", True),
-                batch_size=collection.get("batch_size", 50),
-                start_year=collection.get("start_year", 2000),
-                end_year=collection.get("end_year"),
-                data_types_to_collect=collection.get(
-                    "data_types",
-                    [
-                        "sentinel_weekly_gender",
-                        "sentinel_weekly_age",
-                        "sentinel_weekly_health_center",
-                        "sentinel_weekly_medical_district",
-                        "sentinel_monthly_gender",
-                        "sentinel_monthly_age",
-                        "sentinel_monthly_health_center",
-                        "sentinel_monthly_medical_district",
-                        "notifiable_weekly",
-                    ],
-                ),
-                retry_failed=collection.get("retry_failed", True),
-                max_execution_time_hours=collection.get("max_execution_time_hours", 5.5),
-            )
-
-        # ストレージ設定
-        if "storage" in config_dict:
-            storage = config_dict["storage"]
-            config.storage = StorageConfig(
-                base_directory=storage.get("base_directory", "data/raw"),
-                processed_directory=storage.get("processed_directory", "data/processed"),
-                log_directory=storage.get("log_directory", "data/logs"),
-                directory_structure=storage.get("directory_structure", "{year}/{month}/week_{week}"),
-                auto_commit=storage.get("auto_commit", True),
-                commit_message_template=storage.get(
-                    "commit_message_template", "データ更新: {data_type} - {date_range}"
-                ),
-                keep_shift_jis=storage.get("keep_shift_jis", True),
-            )
-
-        # 品質設定
-        if "quality" in config_dict:
-            quality = config_dict["quality"]
-            config.quality = QualityConfig(
-                file_size_limits=quality.get("file_size_limits", {"csv": (100, 10485760)}),
-                anomaly_detection_enabled=quality.get("anomaly_detection_enabled", True),
-                anomaly_threshold=quality.get("anomaly_threshold", 0.3),
-                quarantine_enabled=quality.get("quarantine_enabled", True),
-                quarantine_directory=quality.get("quarantine_directory", "data/quarantine"),
-            )
-
-        # 通知設定
-        if "notifications" in config_dict:
-            notifications = config_dict["notifications"]
-            config.notifications = NotificationConfig(
-                github_issues_enabled=notifications.get("github_issues_enabled", True),
-                create_issue_on_error=notifications.get("create_issue_on_error", True),
-                create_issue_on_anomaly=notifications.get("create_issue_on_anomaly", True),
-                issue_labels=notifications.get("issue_labels", ["data-collection", "automated"]),
-                max_issues_per_day=notifications.get("max_issues_per_day", 10),
-            )
+        # 各セクション（スケジュール・収集・ストレージ・品質・通知）
+        for section, section_cls in _SECTIONS.items():
+            if section in config_dict:
+                setattr(config, section, _from_dict(section_cls, config_dict[section] or {}))
 
         # データタイプ設定
         if "data_types" in config_dict:
-            for dt in config_dict["data_types"]:
-                data_type_config = DataTypeConfig(
-                    name=dt["name"],
-                    enabled=dt.get("enabled", True),
-                    fetch_method=dt.get("fetch_method", ""),
-                    parameters=dt.get("parameters", {}),
-                    epid_code=dt.get("epid_code", "00"),
-                )
-                config.data_types.append(data_type_config)
+            config.data_types.extend(_from_dict(DataTypeConfig, dt) for dt in config_dict["data_types"])
 
         return config
 
@@ -331,64 +338,21 @@ class ConfigurationManager:
         path = path or self.config_path
         path.parent.mkdir(parents=True, exist_ok=True)
 
+        import yaml
+
+        _, safe_dumper = _yaml_safe_codecs()
         config_dict = self._config_to_dict(config)
 
         with open(path, "w", encoding="utf-8") as f:
-            yaml.dump(config_dict, f, default_flow_style=False, allow_unicode=True)
+            yaml.dump(config_dict, f, Dumper=safe_dumper, default_flow_style=False, allow_unicode=True)
 
         logger.info(f"Configuration saved to {path}")
 
     def _config_to_dict(self, config: DataCollectionConfig) -> dict[str, Any]:
         """設定オブジェクトを辞書に変換"""
-        return {
-            "schedule": {
-                "cron": config.schedule.cron_expression,
-                "timezone": config.schedule.timezone,
-                "manual_trigger_enabled": config.schedule.manual_trigger_enabled,
-            },
-            "collection": {
-                "incremental_mode": config.collection.incremental_mode,
-                "batch_size": config.collection.batch_size,
-                "start_year": config.collection.start_year,
-                "end_year": config.collection.end_year,
-                "data_types": config.collection.data_types_to_collect,
-                "retry_failed": config.collection.retry_failed,
-                "max_execution_time_hours": config.collection.max_execution_time_hours,
-            },
-            "storage": {
-                "base_directory": config.storage.base_directory,
-                "processed_directory": config.storage.processed_directory,
-                "log_directory": config.storage.log_directory,
-                "directory_structure": config.storage.directory_structure,
-                "auto_commit": config.storage.auto_commit,
-                "commit_message_template": config.storage.commit_message_template,
-                "keep_shift_jis": config.storage.keep_shift_jis,
-            },
-            "quality": {
-                "file_size_limits": config.quality.file_size_limits,
-                "anomaly_detection_enabled": config.quality.anomaly_detection_enabled,
-                "anomaly_threshold": config.quality.anomaly_threshold,
-                "quarantine_enabled": config.quality.quarantine_enabled,
-                "quarantine_directory": config.quality.quarantine_directory,
-            },
-            "notifications": {
-                "github_issues_enabled": config.notifications.github_issues_enabled,
-                "create_issue_on_error": config.notifications.create_issue_on_error,
-                "create_issue_on_anomaly": config.notifications.create_issue_on_anomaly,
-                "issue_labels": config.notifications.issue_labels,
-                "max_issues_per_day": config.notifications.max_issues_per_day,
-            },
-            "data_types": [
-                {
-                    "name": dt.name,
-                    "enabled": dt.enabled,
-                    "fetch_method": dt.fetch_method,
-                    "parameters": dt.parameters,
-                    "epid_code": dt.epid_code,
-                }
-                for dt in config.data_types
-            ],
-        }
+        config_dict: dict[str, Any] = {section: _to_dict(getattr(config, section)) for section in _SECTIONS}
+        config_dict["data_types"] = [_to_dict(dt) for dt in config.data_types]
+        return config_dict
 
     def get_enabled_data_types(self) -> list[DataTypeConfig]:
         """有効なデータタイプのみを取得"""
@@ -396,3 +360,10 @@ class ConfigurationManager:
             self.load_config()
 
         return [dt for dt in self.config.data_types if dt.enabled]
+
+
+@lru_cache(maxsize=16)
+def _load_config_cached(path_str: str, mtime_ns: int, size: int) -> DataCollectionConfig:
+    """設定ファイルの読み込み結果をキャッシュ（更新時刻・サイズがキーに含まれるため、変更されると読み直す）"""
+    config_path = Path(path_str)
+    return ConfigurationManager(config_path)._load_config_file(config_path)
@@ -11,13 +11,50 @@ import os
 import re
 import subprocess
 import tempfile
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 logger = logging.getLogger(__name__)
 
+# git commitの要約行からコミットハッシュを抽出する正規表現（例: [main 1a2b3c...] メッセージ）
+_COMMIT_SUMMARY_HASH = re.compile(r"^\[.* ([0-9a-f]{40,64})\]", re.MULTILINE)
+
+
+def _new_sha256(data: bytes = b""):
+    """重複検出用のSHA-256オブジェクトを生成
+
+    改ざん検知ではなく内容の識別用のため、最速のバックエンドを選べるようusedforsecurity=Falseを指定。
+    """
+    return hashlib.sha256(data, usedforsecurity=False)
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """ファイルディスクリプタにデータをすべて書き込む。
+
+    os.writeは要求より少ないバイト数しか書き込まないことがあるため、
+    コピーを作らないようmemoryviewで残りを切り出して書き込み終わるまで繰り返す。
+    """
+    view = memoryview(data)
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+# data_typeとして許可する文字列（ASCII英数字とアンダースコアのみ）
+_DATA_TYPE_PATTERN = re.compile(r"[a-zA-Z0-9_]+")
+
+# ファイル名から年を抽出する正規表現（例: sentinel_weekly_2025_01.csv → 2025）
+_YEAR_IN_FILENAME = re.compile(r"_(\d{4})_\d{2}\.csv$")
+
+# 統計用のファイルタイプ分類（ファイル名に含まれる種別を1回の検索で判定する）
+_FILE_TYPE_IN_FILENAME = re.compile(r"sentinel_weekly|sentinel_monthly|notifiable")
+
 
 @dataclass
 class SaveResult:
@@ -74,6 +111,7 @@ class GitHandler:
             auto_commit: 自動コミット機能を有効にするかどうか（デフォルト: True）
         """
         self.auto_commit = auto_commit
+        self._is_repo: bool | None = None  # is_git_repoの判定結果（初回のみgitを実行する）
 
     def is_git_repo(self) -> bool:
         """現在のディレクトリがGitリポジトリ内にあるかを確認する。
@@ -83,14 +121,19 @@ class GitHandler:
 
         Note:
             エラーが発生した場合はFalseを返す（安全側に倒す）
+            判定結果はインスタンスごとにキャッシュされる
         """
+        if self._is_repo is not None:
+            return self._is_repo
+
         try:
             result = subprocess.run(
                 ["git", "rev-parse", "--is-inside-work-tree"], capture_output=True, text=True, check=False
             )
-            return result.returncode == 0
+            self._is_repo = result.returncode == 0
         except Exception:
-            return False
+            self._is_repo = False
+        return self._is_repo
 
     def add_files(self, files: list[Path]) -> bool:
         """指定されたファイルをGitのステージングエリアに追加する。
@@ -103,13 +146,20 @@ class GitHandler:
 
         Note:
             存在しないファイルは自動的にスキップされる
+            パスはNUL区切りで標準入力から渡すため、ファイル数が多くても引数長の上限に達しない
         """
         try:
             file_paths = [str(f) for f in files if f.exists()]
             if not file_paths:
                 return True
 
-            subprocess.run(["git", "add"] + file_paths, capture_output=True, text=True, check=True)
+            subprocess.run(
+                ["git", "add", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                input="\0".join(file_paths),
+                capture_output=True,
+                text=True,
+                check=True,
+            )
             return True
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to add files to git: {e.stderr}")
@@ -126,6 +176,7 @@ class GitHandler:
 
         Note:
             変更がない場合はコミットを作成せず、成功として扱う
+            コミットハッシュはgit commitの出力から取得し、取得できない場合のみrev-parseを実行する
         """
         try:
             # 変更があるか確認
@@ -135,13 +186,20 @@ class GitHandler:
                 # 変更なし
                 return CommitResult(success=True, message="No changes to commit")
 
-            # コミット実行
-            result = subprocess.run(["git", "commit", "-m", message], capture_output=True, text=True, check=True)
+            # コミット実行（要約行に省略しないハッシュを出力させる）
+            result = subprocess.run(
+                ["git", "-c", "core.abbrev=no", "commit", "-m", message], capture_output=True, text=True, check=True
+            )
 
             # コミットハッシュ取得
-            hash_result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+            hash_match = _COMMIT_SUMMARY_HASH.search(result.stdout or "")
+            if hash_match:
+                commit_hash = hash_match.group(1)
+            else:
+                hash_result = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True)
+                commit_hash = hash_result.stdout.strip()
 
-            return CommitResult(success=True, commit_hash=hash_result.stdout.strip(), message=message)
+            return CommitResult(success=True, commit_hash=commit_hash, message=message)
 
         except subprocess.CalledProcessError as e:
             logger.error(f"Failed to commit: {e.stderr}")
@@ -180,6 +238,12 @@ class StorageManager:
         hash_index: ファイルハッシュとパスのマッピング
     """
 
+    # cleanup_old_filesでメタデータを並行して読み込むスレッド数（小さなファイルの読み込み待ちを重ねる）
+    METADATA_READ_WORKERS = 16
+
+    # save_manyでハッシュ未計算のデータを並行してハッシュ計算するスレッド数（hashlibは計算中にGILを解放する）
+    HASH_WORKERS = os.cpu_count() or 1
+
     def __init__(self, base_path: Path, config: dict[str, Any]):
         """StorageManagerを初期化する。
 
@@ -192,6 +256,7 @@ class StorageManager:
         """
         self.base_path = Path(base_path)
         self.config = config
+        self._commit_template = config.get("commit_message_template", "データ更新: {data_type} - {date_range}")
         self.git_handler = GitHandler(config.get("auto_commit", True))
 
         # ディレクトリ作成
@@ -201,10 +266,30 @@ class StorageManager:
         self.metadata_dir = self.base_path / ".metadata"
         self.metadata_dir.mkdir(parents=True, exist_ok=True)
 
-        # ハッシュインデックスファイル
+        # 作成済みのディレクトリ（保存のたびにmkdirのシステムコールを発行しないよう記録する）
+        self._created_dirs: set[Path] = {self.base_path, self.metadata_dir}
+
+        # ベースパス直下のCSVファイル名一覧のキャッシュ（ディレクトリの更新時刻, ソート済みファイル名）
+        self._csv_names_cache: tuple[int, list[str]] | None = None
+
+        # ハッシュインデックスファイル(前回の圧縮以降の変更は追記専用のログに1行ずつ記録する)
         self.hash_index_file = self.metadata_dir / "hash_index.json"
+        self.hash_index_log_file = self.metadata_dir / "hash_index.log"
+        self._hash_index_log_lines = 0
+        self._path_to_hash: dict[str, str] = {}
         self.hash_index = self._load_hash_index()
 
+        # ファイルパスからハッシュへの逆引きインデックス（上書き時に既存ファイルを再ハッシュしないため）
+        self._path_to_hash = {
+            path: file_hash
+            for file_hash, paths in self.hash_index.items()
+            for path in ([paths] if isinstance(paths, str) else paths)
+        }
+
+        # save_many実行中はハッシュインデックスのファイル書き込みを保留し、最後に1回だけ書き出す
+        self._defer_hash_index_write = False
+        self._hash_index_dirty = False
+
     def organize_file_path(self, data_type: str, year: int, period: int, is_monthly: bool = False) -> Path:
         """フラットなディレクトリ構造でのファイルパス生成する。
 
@@ -220,10 +305,13 @@ class StorageManager:
         Note:
             現在の実装ではフラット構造のため、すべてのファイルが
             base_path直下に配置される
+            このインスタンスで作成済みのディレクトリにはmkdirを再実行しない
         """
         # すべてのファイルをrawディレクトリ直下に配置
         dir_path = self.base_path
-        dir_path.mkdir(parents=True, exist_ok=True)
+        if dir_path not in self._created_dirs:
+            dir_path.mkdir(parents=True, exist_ok=True)
+            self._created_dirs.add(dir_path)
         return dir_path
 
     def save_with_metadata(
@@ -235,6 +323,7 @@ class StorageManager:
         is_monthly: bool = False,
         additional_metadata: dict[str, Any] | None = None,
         force_overwrite: bool = False,
+        sha256_hash: str | None = None,
     ) -> SaveResult:
         """データファイルとメタデータを保存する。
 
@@ -246,12 +335,14 @@ class StorageManager:
             is_monthly: 月次データの場合True、週次データの場合False
             additional_metadata: 追加のメタデータ（オプション）
             force_overwrite: 既存ファイルを強制的に上書きする場合True
+            sha256_hash: 計算済みのSHA256ハッシュ（省略時はdataから計算）
 
         Returns:
             保存操作の結果を含むSaveResultオブジェクト
 
         Note:
             - SHA256ハッシュで重複チェックを行う
+            - 取得時に計算済みのハッシュが渡されていれば再計算しない
             - 重複データは保存をスキップする（force_overwriteがFalseの場合）
             - メタデータは.metadataディレクトリに別途保存される
         """
@@ -262,8 +353,8 @@ class StorageManager:
             return SaveResult(success=False, error=error_msg)
 
         try:
-            # データハッシュ計算
-            data_hash = hashlib.sha256(data).hexdigest()
+            # データハッシュ計算（ダウンロード時にストリーミングで計算済みなら再利用）
+            data_hash = sha256_hash or _new_sha256(data).hexdigest()
 
             # 重複チェック（force_overwriteがFalseの場合のみ）
             if not force_overwrite and self.check_duplicates(data_hash):
@@ -281,35 +372,6 @@ class StorageManager:
             # 新規ファイルかどうかを判定
             is_new_file = not file_path.exists()
 
-            # 既存ファイルのチェック (force_overwriteの場合、古いハッシュを削除)
-            if file_path.exists() and force_overwrite:
-                # 既存ファイルのハッシュを計算
-                old_data = file_path.read_bytes()
-                old_hash = hashlib.sha256(old_data).hexdigest()
-
-                # ヘルパーメソッドを使用してハッシュインデックスから削除
-                file_path_str = str(file_path)
-                self._remove_from_hash_index(old_hash, file_path_str)
-
-                logger.info(f"Overwriting existing file: {file_path}")
-
-            # CSVファイル保存(Shift_JISのまま) - 原子的書き込みで安全性を確保
-            # 一時ファイルを作成して書き込み
-            temp_fd, temp_path = tempfile.mkstemp(dir=file_path.parent, prefix=f".{file_path.stem}_", suffix=".tmp")
-            try:
-                os.write(temp_fd, data)
-                os.close(temp_fd)
-
-                # 原子的にファイルを置き換え（POSIX準拠）
-                # これにより、書き込み中のエラーでもデータロスを防げる
-                Path(temp_path).replace(file_path)
-            except Exception:
-                # エラー時は一時ファイルをクリーンアップ
-                temp_file = Path(temp_path)
-                if temp_file.exists():
-                    temp_file.unlink()
-                raise
-
             # メタデータ生成
             period_type = "monthly" if is_monthly else "weekly"
             metadata = {
@@ -333,11 +395,37 @@ class StorageManager:
             metadata_filename = f"{filename.replace('.csv', '.json')}"
             metadata_path = self.metadata_dir / metadata_filename
 
-            with metadata_path.open("w", encoding="utf-8") as f:
-                json.dump(metadata, f, ensure_ascii=False, indent=2)
+            # CSVファイル(Shift_JISのまま)とメタデータを両方とも一時ファイルに書き終えてから、
+            # 続けて置き換える - 片方だけ更新された状態や書きかけのファイルが残らないようにする
+            temp_paths: list[Path] = []
+            try:
+                temp_paths.append(self._write_temp_file(file_path, data))
+                # 文字列にまとめてから1回で書き込む(json.dumpはチャンクごとにwriteを呼ぶため)
+                metadata_bytes = json.dumps(metadata, ensure_ascii=False, indent=2).encode("utf-8")
+                temp_paths.append(self._write_temp_file(metadata_path, metadata_bytes))
+
+                # 原子的にファイルを置き換え（POSIX準拠）
+                for temp_path, target_path in zip(temp_paths, (file_path, metadata_path), strict=True):
+                    temp_path.replace(target_path)
+            except Exception:
+                # エラー時は一時ファイルをクリーンアップ
+                for temp_path in temp_paths:
+                    temp_path.unlink(missing_ok=True)
+                raise
+
+            if is_new_file:
+                self._csv_names_cache = None
+
+            # ハッシュインデックス更新（ファイルの置き換えに成功してから、古いハッシュの削除と新しいハッシュの追加を行う）
+            file_path_str = str(file_path)
+            if not is_new_file and force_overwrite:
+                # 既存ファイルのハッシュは逆引きインデックスから取得（ファイルを読み直してハッシュ計算しない）
+                old_hash = self._path_to_hash.get(file_path_str)
+                if old_hash is not None:
+                    self._remove_from_hash_index(old_hash, file_path_str)
+                logger.info(f"Overwrote existing file: {file_path}")
 
-            # ハッシュインデックス更新
-            self._update_hash_index(data_hash, str(file_path))
+            self._update_hash_index(data_hash, file_path_str)
 
             logger.info(f"Saved file: {file_path} (new={is_new_file})")
 
@@ -347,6 +435,100 @@ class StorageManager:
             logger.exception("Failed to save file")
             return SaveResult(success=False, error=str(e))
 
+    def _with_precomputed_hashes(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """sha256_hashが未指定の項目について、ハッシュを並行して計算した項目のリストを返す。
+
+        Note:
+            呼び出し元の辞書は変更せず、ハッシュを追加した新しい辞書に置き換える
+        """
+        # 不正なデータの項目は対象外とし、save_with_metadataで項目ごとの失敗として扱う
+        pending = [
+            i for i, item in enumerate(items) if isinstance(item.get("data"), bytes) and not item.get("sha256_hash")
+        ]
+        if len(pending) < 2:
+            return items
+
+        with ThreadPoolExecutor(max_workers=min(self.HASH_WORKERS, len(pending))) as executor:
+            hashes = list(executor.map(lambda i: _new_sha256(items[i]["data"]).hexdigest(), pending))
+
+        prepared = list(items)
+        for i, data_hash in zip(pending, hashes, strict=True):
+            prepared[i] = {**items[i], "sha256_hash": data_hash}
+        return prepared
+
+    @staticmethod
+    def _write_temp_file(target_path: Path, data: bytes) -> Path:
+        """置き換え用の一時ファイルを対象と同じディレクトリに作成してデータを書き込む。
+
+        Args:
+            target_path: 最終的に置き換える対象のファイルパス
+            data: 書き込むデータ
+
+        Returns:
+            書き込み済みの一時ファイルのパス（同一ファイルシステム上なのでreplaceが原子的に行える）
+        """
+        temp_fd, temp_name = tempfile.mkstemp(dir=target_path.parent, prefix=f".{target_path.stem}_", suffix=".tmp")
+        temp_path = Path(temp_name)
+        try:
+            try:
+                _write_all(temp_fd, data)
+            finally:
+                os.close(temp_fd)
+        except Exception:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return temp_path
+
+    @contextmanager
+    def batch_save(self) -> Iterator[None]:
+        """ブロック内の保存によるハッシュインデックスの書き出しを、ブロックの終了時に1回にまとめる。
+
+        Note:
+            ブロック内で例外が発生した場合も、それまでに保存したファイルはインデックスに反映する。
+            入れ子で使用した場合は最も外側のブロックの終了時に書き出す。
+            書き出しは追記ログの統合とファイル名順の整列を含む圧縮として行い、
+            コミットの有無にかかわらずコミットできる状態のインデックスを残す。
+        """
+        if self._defer_hash_index_write:
+            yield
+            return
+
+        self._defer_hash_index_write = True
+        try:
+            yield
+        finally:
+            self._defer_hash_index_write = False
+            if self._hash_index_dirty or self.hash_index_log_file.exists():
+                self.compact_hash_index()
+
+    def save_many(self, items: list[dict[str, Any]]) -> list[SaveResult]:
+        """複数のデータファイルをまとめて保存する。
+
+        Args:
+            items: save_with_metadataのキーワード引数を表す辞書のリスト
+
+        Returns:
+            各データの保存結果を入力と同じ順序で並べたSaveResultのリスト
+
+        Note:
+            ファイルごとにハッシュインデックス全体を書き直す代わりに、
+            バッチの最後に1回だけハッシュインデックスを書き出す。
+            sha256_hashが渡されていないデータは、保存の前にまとめて並行してハッシュ計算する。
+        """
+        items = self._with_precomputed_hashes(items)
+
+        results: list[SaveResult] = []
+        try:
+            with self.batch_save():
+                results = [self.save_with_metadata(**item) for item in items]
+        except Exception as e:
+            # インデックスに反映できなかった保存は失敗として扱う
+            results = [
+                SaveResult(success=False, error=str(e)) if r.success and not r.is_duplicate else r for r in results
+            ]
+
+        return results
+
     def commit_changes(
         self, message: str | None = None, data_type: str | None = None, date_range: str | None = None
     ) -> CommitResult:
@@ -364,7 +546,13 @@ class StorageManager:
             - auto_commitが無効な場合はスキップされる
             - Gitリポジトリでない場合はスキップされる
             - 変更がない場合はコミットを作成しない
+            - スキップする場合も、追記ログはハッシュインデックスに統合する
         """
+        # 追記ログの反映とファイル名順の整列をハッシュインデックスに行う
+        # (コミットをスキップした場合も、ワークフローが後からデータディレクトリをコミットするため)
+        if self.hash_index_log_file.exists():
+            self.compact_hash_index()
+
         if not self.git_handler.auto_commit:
             logger.info("Auto commit is disabled. Skipping git commit.")
             return CommitResult(success=True, message="Auto commit disabled")
@@ -376,8 +564,7 @@ class StorageManager:
         # メッセージ生成
         if not message:
             if data_type and date_range:
-                template = self.config.get("commit_message_template", "データ更新: {data_type} - {date_range}")
-                message = template.format(data_type=data_type, date_range=date_range)
+                message = self._commit_template.format(data_type=data_type, date_range=date_range)
             else:
                 message = f"データ更新: {datetime.now().strftime('%Y-%m-%d %H:%M')}"
 
@@ -408,14 +595,34 @@ class StorageManager:
         Note:
             ファイルが存在しない場合や読み込みエラーの場合は空の辞書を返す
             後方互換性のため、古い形式（string）と新形式（list）の両方をサポート
+            追記ログ(hash_index.log)がある場合は、読み込んだインデックスに順に適用する
         """
+        hash_index: dict[str, str | list[str]] = {}
         if self.hash_index_file.exists():
             try:
-                with self.hash_index_file.open() as f:
-                    return json.load(f)
+                hash_index = json.loads(self.hash_index_file.read_bytes())
             except Exception as e:
                 logger.warning(f"Failed to load hash index: {e}")
-        return {}
+
+        if self.hash_index_log_file.exists():
+            self.hash_index = hash_index
+            try:
+                with self.hash_index_log_file.open(encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        entry = json.loads(line)
+                        if entry["op"] == "remove":
+                            self._discard_from_hash_index(entry["hash"], entry["path"])
+                        else:
+                            self._add_to_hash_index(entry["hash"], entry["path"])
+                        self._hash_index_log_lines += 1
+            except Exception as e:
+                # 書き込み途中で中断した末尾の行などは無視し、読み込めた分までを採用する
+                logger.warning(f"Failed to replay hash index log: {e}")
+            hash_index = self.hash_index
+
+        return hash_index
 
     def _remove_from_hash_index(self, file_hash: str, file_path: str) -> None:
         """ハッシュインデックスから特定のファイルパスを削除する（ヘルパーメソッド）
@@ -424,9 +631,33 @@ class StorageManager:
             file_hash: 削除対象のファイルハッシュ
             file_path: 削除対象のファイルパス
         """
-        if file_hash not in self.hash_index:
+        if not self._discard_from_hash_index(file_hash, file_path):
+            return
+
+        # 削除を追記ログに記録（バッチ保存中は最後にまとめて書き出す）
+        if self._defer_hash_index_write:
+            self._hash_index_dirty = True
             return
 
+        try:
+            self._append_hash_index_log("remove", file_hash, file_path)
+        except Exception as e:
+            logger.error(f"Failed to update hash index after removal: {e}")
+            # ハッシュインデックス更新失敗は重要なエラーとして扱う
+            raise
+
+    def _discard_from_hash_index(self, file_hash: str, file_path: str) -> bool:
+        """メモリ上のハッシュインデックスから特定のファイルパスを削除する。
+
+        Returns:
+            インデックスにハッシュが存在した場合True
+        """
+        if file_hash not in self.hash_index:
+            return False
+
+        if self._path_to_hash.get(file_path) == file_hash:
+            del self._path_to_hash[file_path]
+
         current_entry = self.hash_index[file_hash]
 
         if isinstance(current_entry, str):
@@ -443,14 +674,7 @@ class StorageManager:
             elif len(current_entry) == 1:
                 self.hash_index[file_hash] = current_entry[0]
 
-        # ハッシュインデックスファイルを更新
-        try:
-            with self.hash_index_file.open("w") as f:
-                json.dump(self.hash_index, f, indent=2)
-        except Exception as e:
-            logger.error(f"Failed to update hash index after removal: {e}")
-            # ハッシュインデックス更新失敗は重要なエラーとして扱う
-            raise
+        return True
 
     def _add_to_hash_index(self, file_hash: str, file_path: str) -> None:
         """ハッシュインデックスに新しいファイルを追加する。
@@ -462,6 +686,8 @@ class StorageManager:
         Note:
             同じハッシュの複数ファイルをサポート(リスト形式で管理)
         """
+        self._path_to_hash[file_path] = file_hash
+
         if file_hash not in self.hash_index:
             # 新規エントリは単一の文字列として保存(互換性とサイズ節約)
             self.hash_index[file_hash] = file_path
@@ -507,30 +733,79 @@ class StorageManager:
         return sorted_index
 
     def _update_hash_index(self, file_hash: str, file_path: str) -> None:
-        """ハッシュインデックスを更新してファイルに保存する。
+        """ハッシュインデックスを更新して追記ログに記録する。
 
         Args:
             file_hash: ファイルのSHA256ハッシュ
             file_path: ファイルのパス（文字列）
 
         Note:
-            保存に失敗した場合は警告ログを出力するが、処理は継続される
+            インデックス全体は書き直さず、追記ログに1行だけ書き込む
             同じハッシュの複数ファイルをサポート(リスト形式で管理)
         """
         # インデックスに追加
         self._add_to_hash_index(file_hash, file_path)
 
+        # バッチ保存中は書き出しを保留する
+        if self._defer_hash_index_write:
+            self._hash_index_dirty = True
+            return
+
+        try:
+            self._append_hash_index_log("add", file_hash, file_path)
+        except Exception as e:
+            logger.error(f"Failed to update hash index: {e}")
+            raise
+
+    def _append_hash_index_log(self, op: str, file_hash: str, file_path: str) -> None:
+        """ハッシュインデックスの変更を追記ログに1行書き込む。
+
+        Note:
+            ログがインデックスのエントリ数の2倍を超えたら、インデックスに統合してログを空にする
+        """
+        line = json.dumps({"op": op, "hash": file_hash, "path": file_path}, ensure_ascii=False)
+        with self.hash_index_log_file.open("a", encoding="utf-8") as f:
+            f.write(line + "\n")
+        self._hash_index_log_lines += 1
+
+        if self._hash_index_log_lines > 2 * max(len(self.hash_index), 1):
+            self.compact_hash_index()
+
+    def compact_hash_index(self) -> None:
+        """追記ログを統合したハッシュインデックスを書き出し、ログを削除する。
+
+        Raises:
+            Exception: 書き込みに失敗した場合
+        """
+        self._write_hash_index()
+
+    def _write_hash_index(self) -> None:
+        """ハッシュインデックスをファイル名順にソートしてファイルに書き出す。
+
+        Note:
+            書き出した内容に追記ログの変更も含まれるため、書き出し後にログを削除する
+            保存ごとには呼ばれず、圧縮時（バッチ保存の終了時・commit_changesの実行時・ログの肥大化時）にのみ実行される
+
+        Raises:
+            Exception: 書き込みに失敗した場合
+        """
         try:
             # ファイル名順にソート
             sorted_index = self._sort_hash_index_by_filename()
 
-            with self.hash_index_file.open("w") as f:
-                # sort_keys=Falseにして、挿入順序を保持(Python 3.7+では辞書は挿入順序を保持)
-                json.dump(sorted_index, f, indent=2, ensure_ascii=False, sort_keys=False)
+            # sort_keys=Falseにして、挿入順序を保持(Python 3.7+では辞書は挿入順序を保持)
+            # コミットされるファイルなので整形は維持し、エンコード済みのバイト列を1回で書き込む
+            content = json.dumps(sorted_index, indent=2, ensure_ascii=False, sort_keys=False)
+            self.hash_index_file.write_bytes(content.encode("utf-8"))
 
             # メモリ上のインデックスも更新 (ソート済みのものに置き換え)
             # これにより、同一セッション内での重複チェックなどが正しく動作する
             self.hash_index = sorted_index
+            self._hash_index_dirty = False
+
+            # インデックスに統合済みの追記ログを削除
+            self.hash_index_log_file.unlink(missing_ok=True)
+            self._hash_index_log_lines = 0
         except Exception as e:
             logger.error(f"Failed to update hash index: {e}")
             # ハッシュインデックスの更新失敗は重要なエラーとして扱う
@@ -549,13 +824,12 @@ class StorageManager:
             パストラバーサル攻撃や不正な文字を防ぐため、
             英数字とアンダースコアのみを許可する。
         """
-        import re
-
         # 英数字とアンダースコアのみを許可
-        pattern = re.compile(r"^[a-zA-Z0-9_]+$")
-        return bool(pattern.match(data_type))
+        return _DATA_TYPE_PATTERN.fullmatch(data_type) is not None
 
-    def _get_month_from_week(self, year: int, week: int) -> int:
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _get_month_from_week(year: int, week: int) -> int:
         """ISO週番号から対応する月を計算する。
 
         Args:
@@ -568,6 +842,7 @@ class StorageManager:
         Note:
             ISO 8601規格に基づいて計算を行う。
             週の始まりは月曜日として扱われる。
+            (年, 週)の組み合わせは少ないため、結果をキャッシュする。
         """
         # ISO週番号から日付を計算
         jan4 = date(year, 1, 4)
@@ -589,22 +864,73 @@ class StorageManager:
             フラット構造のため、base_path直下のCSVファイルを検索する。
             年でのフィルタリングは正規表現で厳密に行う。
         """
-        pattern = "*.csv"
+        # フラット構造なので常にベースパス直下のファイル名だけで絞り込む
+        names = self._csv_names()
+        base_path = self.base_path
 
-        # フラット構造なので常にベースパスから検索
-        search_path = self.base_path
-        files = list(search_path.glob(pattern))  # rglobではなくglobを使用
+        if not data_type and not year:
+            return [base_path / name for name in names]
 
-        if data_type:
-            files = [f for f in files if data_type in f.name]
+        # データタイプと年の条件を1つの正規表現にまとめ、1回の走査で絞り込む
+        # 条件に一致したファイルだけPathオブジェクトを生成（ファイル名一覧はソート済み）
+        match = self._existing_file_regex(data_type or None, year or None).match
+        return [base_path / name for name in names if match(name)]
 
-        if year:
-            # 正規表現でより厳密に年をフィルタリング
-            # 例: sentinel_weekly_2025_01.csv にマッチ
-            year_pattern = re.compile(rf"_{year}_\d{{2}}\.csv$")
-            files = [f for f in files if year_pattern.search(f.name)]
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _existing_file_regex(data_type: str | None, year: int | None) -> re.Pattern[str]:
+        """get_existing_filesの絞り込み条件を表す正規表現を取得する。
 
-        return sorted(files)
+        Note:
+            データタイプはファイル名のどこかに含まれていればよい（先読みで判定）。
+            年は例: sentinel_weekly_2025_01.csv のように末尾の「_年_2桁.csv」で厳密に判定する。
+        """
+        type_part = f"(?=.*{re.escape(data_type)})" if data_type else ""
+        year_part = rf".*_{year}_\d{{2}}\.csv$" if year else ""
+        return re.compile(type_part + year_part)
+
+    def _csv_names(self) -> list[str]:
+        """ベースパス直下のCSVファイル名をソートして取得する。
+
+        Returns:
+            ソート済みのファイル名のリスト（呼び出し側で変更しないこと）
+
+        Note:
+            ディレクトリの更新時刻が前回と同じならキャッシュした一覧を返す。
+            ファイルの追加・削除・置き換えでディレクトリの更新時刻は変わるため、
+            外部での変更も検出できる。このインスタンスでの変更時は明示的に破棄する。
+        """
+        try:
+            mtime_ns = self.base_path.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+
+        cache = self._csv_names_cache
+        if cache is not None and cache[0] == mtime_ns:
+            return cache[1]
+
+        names = sorted(entry.name for entry in self._iter_csv_entries())
+        self._csv_names_cache = (mtime_ns, names)
+        return names
+
+    def _iter_csv_entries(self) -> Iterator[os.DirEntry]:
+        """ベースパス直下のCSVファイルを列挙する。
+
+        Returns:
+            CSVファイルのos.DirEntryを返すイテレータ
+
+        Note:
+            os.scandirのDirEntryはファイル種別やstat結果をキャッシュするため、
+            ファイルごとのPath生成やstatのシステムコールを省ける。
+            従来のPath.glob("*.csv")と同じく、名前のみで判定する(ドットで始まる名前も含む)。
+        """
+        try:
+            with os.scandir(self.base_path) as it:
+                for entry in it:
+                    if entry.name.endswith(".csv"):
+                        yield entry
+        except FileNotFoundError:
+            return
 
     def get_metadata(self, file_path: Path) -> dict[str, Any] | None:
         """指定されたファイルのメタデータを取得する。
@@ -624,8 +950,7 @@ class StorageManager:
 
         if metadata_path.exists():
             try:
-                with metadata_path.open() as f:
-                    return json.load(f)
+                return json.loads(metadata_path.read_bytes())
             except Exception as e:
                 logger.warning(f"Failed to load metadata: {e}")
 
@@ -643,18 +968,22 @@ class StorageManager:
         Note:
             メタデータのタイムスタンプを基準に判定を行う。
             対応するメタデータファイルも一緒に削除される。
+            メタデータの読み込みはスレッドプールで並行して行い、削除は順番に行う。
         """
         cutoff_date = datetime.now() - timedelta(days=days_to_keep)
         deleted_count = 0
 
-        for file_path in self.base_path.glob("*.csv"):
-            metadata = self.get_metadata(file_path)
+        file_paths = [Path(entry.path) for entry in self._iter_csv_entries()]
+        with ThreadPoolExecutor(max_workers=self.METADATA_READ_WORKERS) as executor:
+            metadata_list = list(executor.map(self.get_metadata, file_paths))
 
+        for file_path, metadata in zip(file_paths, metadata_list, strict=True):
             if metadata:
                 try:
                     file_date = datetime.fromisoformat(metadata["timestamp"])
                     if file_date < cutoff_date:
                         file_path.unlink()
+                        self._csv_names_cache = None
 
                         # メタデータファイルも削除
                         metadata_filename = f"{file_path.stem}.json"
@@ -687,32 +1016,29 @@ class StorageManager:
         """
         total_files = 0
         total_size = 0
-        file_types = {}
-        year_stats = {}
+        file_types: dict[str, dict[str, int]] = {}
+        year_stats: dict[int, dict[str, int]] = {}
 
-        for file_path in self.base_path.glob("*.csv"):
+        for entry in self._iter_csv_entries():
+            name = entry.name
             total_files += 1
-            file_size = file_path.stat().st_size
+            file_size = entry.stat().st_size
             total_size += file_size
 
             # ファイルタイプ別統計
-            for data_type in ["sentinel_weekly", "sentinel_monthly", "notifiable"]:
-                if data_type in file_path.name:
-                    if data_type not in file_types:
-                        file_types[data_type] = {"count": 0, "size": 0}
-                    file_types[data_type]["count"] += 1
-                    file_types[data_type]["size"] += file_size
-                    break
+            type_match = _FILE_TYPE_IN_FILENAME.search(name)
+            if type_match:
+                type_stats = file_types.setdefault(type_match.group(), {"count": 0, "size": 0})
+                type_stats["count"] += 1
+                type_stats["size"] += file_size
 
             # 年別統計（ファイル名から年を抽出）
             # 例: sentinel_weekly_2025_01.csv から 2025 を抽出
-            year_match = re.search(r"_(\d{4})_\d{2}\.csv$", file_path.name)
+            year_match = _YEAR_IN_FILENAME.search(name)
             if year_match:
-                year = int(year_match.group(1))
-                if year not in year_stats:
-                    year_stats[year] = {"count": 0, "size": 0}
-                year_stats[year]["count"] += 1
-                year_stats[year]["size"] += file_size
+                stats = year_stats.setdefault(int(year_match.group(1)), {"count": 0, "size": 0})
+                stats["count"] += 1
+                stats["size"] += file_size
 
         return {
             "total_files": total_files,
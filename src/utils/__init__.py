@@ -0,0 +1,7 @@
+"""
+Utility modules for data collection system
+"""
+
+from .periods import weeks_in_year
+
+__all__ = ["weeks_in_year"]
@@ -0,0 +1,12 @@
+"""
+週番号・月番号などの期間に関するユーティリティ
+"""
+
+from datetime import date
+from functools import lru_cache
+
+
+@lru_cache(maxsize=256)
+def weeks_in_year(year: int) -> int:
+    """指定年の週数を取得(ISO週番号基準)"""
+    return date(year, 12, 28).isocalendar()[1]
@@ -0,0 +1,118 @@
+"""
+欠番チェックスクリプトのテスト
+"""
+
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+from collections import defaultdict
+from pathlib import Path
+
+# パスの設定
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.check_missing import BATCH_MATCH_MIN, _parse, analyse, collect
+
+# 高速化前の実装と同じパターン(週次として解析できない場合のみ月次として解析する)
+BASELINE_PAT_WEEK = re.compile(r"(?P<base>.+?_weekly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)")
+BASELINE_PAT_MONTH = re.compile(r"(?P<base>.+?_monthly(?:_[^_]+)??)_(?P<year>\d{4})_(?P<idx>\d{1,2})(?:_|-)")
+
+
+def _parse_baseline(names):
+    """高速化前の実装と同じ手順でファイル名を解析(高速化した解析結果の比較用)"""
+    weekly: defaultdict[tuple[str, int], int] = defaultdict(int)
+    monthly: defaultdict[tuple[str, int], int] = defaultdict(int)
+    for raw_name in names:
+        name = os.fsdecode(raw_name)
+        m, found = BASELINE_PAT_WEEK.search(name), weekly
+        if m is None:
+            m, found = BASELINE_PAT_MONTH.search(name), monthly
+        if m:
+            found[(m["base"], int(m["year"]))] |= 1 << int(m["idx"])
+    return dict(weekly), dict(monthly)
+
+
+class TestParse(unittest.TestCase):
+    """ファイル名解析のテスト"""
+
+    NAMES = [
+        b"sentinel_weekly_gender_2023_1-20230110.csv",
+        b"sentinel_weekly_2023_2-20230117.csv",
+        b"sentinel_monthly_2023_12_extra.csv",
+        b"sentinel_weekly_a_b_2023_3-x.csv",
+        b"sentinel_weekly_2023_123-x.csv",
+        b"sentinel_monthly_2023_1_weekly_99-x.csv",
+        b"x_monthly_2023_1_weekly_2023_5-x.csv",
+        b"x_weekly_2023_5_monthly_2023_1-x.csv",
+        b"notifiable_2023_1.csv",
+        b"_weekly_2023_1-x.csv",
+    ]
+
+    def _parse(self, names):
+        weekly: defaultdict[tuple[str, int], int] = defaultdict(int)
+        monthly: defaultdict[tuple[str, int], int] = defaultdict(int)
+        _parse(names, weekly, monthly)
+        return dict(weekly), dict(monthly)
+
+    def test_weekly_takes_precedence_over_monthly(self):
+        """週次・月次の両方を含むファイル名は、月次が先に現れても週次として解析されることのテスト"""
+        weekly, monthly = self._parse([b"x_monthly_2023_1_weekly_2023_5-x.csv"])
+
+        self.assertEqual(weekly, {("x_monthly_2023_1_weekly", 2023): 1 << 5})
+        self.assertEqual(monthly, {})
+
+    def test_weekly_parse_failure_falls_back_to_monthly(self):
+        """_weekly_を含んでも週次として解析できないファイル名は月次として解析されることのテスト"""
+        weekly, monthly = self._parse([b"sentinel_monthly_2023_1_weekly_99-x.csv"])
+
+        self.assertEqual(weekly, {})
+        self.assertEqual(monthly, {("sentinel_monthly", 2023): 1 << 1})
+
+    def test_matches_baseline(self):
+        """高速パスの解析結果が高速化前の実装と一致することのテスト"""
+        self.assertEqual(self._parse(self.NAMES), _parse_baseline(self.NAMES))
+
+    def test_batch_match_matches_baseline(self):
+        """ファイル数が多く一括マッチに切り替わる場合も高速化前の実装と一致することのテスト"""
+        names = self.NAMES * BATCH_MATCH_MIN
+        self.assertEqual(self._parse(names), _parse_baseline(names))
+
+
+class TestCollectAndAnalyse(unittest.TestCase):
+    """収集と欠番分析のテスト"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_collect_counts_files_in_subdirectories(self):
+        """直下とサブディレクトリのファイルを重複なく集計することのテスト"""
+        (self.data_dir / "sub").mkdir()
+        (self.data_dir / "sentinel_weekly_2020_1-x.csv").touch()
+        (self.data_dir / "sub" / "sentinel_weekly_2020_1-y.csv").touch()
+        (self.data_dir / "sub" / "sentinel_weekly_2020_3-x.csv").touch()
+        (self.data_dir / "sub" / "sentinel_monthly_2020_2-x.csv").touch()
+
+        weekly, monthly, total_weekly, total_monthly = collect(self.data_dir)
+
+        self.assertEqual(weekly[("sentinel_weekly", 2020)], (1 << 1) | (1 << 3))
+        self.assertEqual(monthly[("sentinel_monthly", 2020)], 1 << 2)
+        self.assertEqual((total_weekly, total_monthly), (2, 1))
+
+    def test_analyse_reports_missing_indexes(self):
+        """欠番がbase、年の順に昇順で列挙されることのテスト"""
+        found = {("b", 2020): (1 << 1) | (1 << 3), ("a", 2020): sum(1 << i for i in range(1, 13))}
+
+        missing = list(analyse(found, 12, lambda _: 4))
+
+        self.assertEqual(missing, [("b", 2020, [2, 4])])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -6,7 +6,7 @@ import sys
 import tempfile
 import unittest
 from pathlib import Path
-from unittest.mock import mock_open, patch
+from unittest.mock import Mock, mock_open, patch
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -83,6 +83,16 @@ class TestConfigurationManager(unittest.TestCase):
         self.assertFalse(result.is_valid)
         self.assertIn("Batch size must be at least 1", result.errors)
 
+    def test_validate_config_invalid_concurrency(self):
+        """無効な同時取得数の検証テスト"""
+        config = self.config_manager._get_default_config()
+        config.collection.concurrency = 0
+
+        result = self.config_manager.validate_config(config)
+
+        self.assertFalse(result.is_valid)
+        self.assertIn("Concurrency must be at least 1", result.errors)
+
     def test_validate_config_no_data_types(self):
         """データタイプなしの検証テスト"""
         config = self.config_manager._get_default_config()
@@ -142,19 +152,44 @@ class TestConfigurationManager(unittest.TestCase):
         self.assertEqual(config.data_types[0].name, "test_type")
         self.assertEqual(config.data_types[0].epid_code, "501")
 
+    def test_parse_config_round_trip(self):
+        """辞書への変換と解析で設定が復元され、未知のキーは無視されることのテスト"""
+        config = self.config_manager._get_default_config()
+        config_dict = self.config_manager._config_to_dict(config)
+        config_dict["schedule"]["unknown_key"] = "ignored"
+
+        self.assertEqual(self.config_manager._parse_config(config_dict), config)
+
     @patch("builtins.open", mock_open(read_data=""))
-    @patch("yaml.safe_load")
+    @patch("yaml.load")
     @patch.object(Path, "exists")
     def test_load_config_from_file(self, mock_exists, mock_yaml_load):
         """ファイルから設定読み込みのテスト"""
         mock_exists.return_value = True
         mock_yaml_load.return_value = {"schedule": {"cron": "0 0 * * *"}, "collection": {"batch_size": 50}}
 
-        config = self.config_manager.load_config()
+        with patch.object(Path, "stat", return_value=Mock(st_mtime_ns=1, st_size=1)):
+            config = self.config_manager.load_config()
 
         self.assertIsInstance(config, DataCollectionConfig)
         mock_yaml_load.assert_called_once()
 
+    def test_load_config_cached_until_modified(self):
+        """ファイルが変更されるまで読み込み結果が再利用されることのテスト"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config_path = Path(temp_dir) / "config.yml"
+            config_path.write_text("collection:\n  batch_size: 10\n", encoding="utf-8")
+
+            first = self.config_manager.load_config(config_path)
+            with patch("yaml.load") as mock_yaml_load:
+                second = ConfigurationManager(config_path).load_config()
+            mock_yaml_load.assert_not_called()
+            self.assertIs(first, second)
+
+            # サイズが変わると読み直される
+            config_path.write_text("collection:\n  batch_size: 20\n\n", encoding="utf-8")
+            self.assertEqual(self.config_manager.load_config(config_path).collection.batch_size, 20)
+
     @patch.object(Path, "exists")
     def test_load_config_file_not_found(self, mock_exists):
         """設定ファイルが存在しない場合のテスト"""
@@ -5,7 +5,7 @@
 import sys
 import unittest
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
@@ -25,6 +25,7 @@ class TestDataCollectorOptions(unittest.TestCase):
         self.mock_config.collection = Mock()
         self.mock_config.collection.incremental_mode = False
         self.mock_config.collection.batch_size = 10
+        self.mock_config.collection.concurrency = 2
         self.mock_config.collection.data_types_to_collect = ["test_data"]
         self.mock_config.collection.max_execution_time_hours = 6
         self.mock_config.storage = Mock()
@@ -115,7 +116,7 @@ class TestDataCollectorOptions(unittest.TestCase):
         mock_fetcher.fetch_with_retry.return_value = mock_result
 
         # ストレージのモック
-        mock_storage = Mock()
+        mock_storage = MagicMock()
         mock_storage_class.return_value = mock_storage
         mock_save_result = SaveResult(success=True, is_duplicate=False)
         mock_storage.save_with_metadata.return_value = mock_save_result
@@ -202,6 +203,7 @@ class TestDataCollectorIntegration(unittest.TestCase):
         mock_config.collection = Mock()
         mock_config.collection.incremental_mode = True
         mock_config.collection.batch_size = 10
+        mock_config.collection.concurrency = 2
         mock_config.collection.max_execution_time_hours = 6
         mock_config.storage = Mock()
         mock_config.storage.auto_commit = False
@@ -5,13 +5,20 @@
 import asyncio
 import hashlib
 import sys
+import tempfile
+import threading
 import unittest
 from datetime import datetime
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+from urllib.parse import urlencode
+
+from requests.exceptions import ChunkedEncodingError
+from requests.exceptions import ConnectionError as RequestsConnectionError
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from src.fetchers.base_fetcher import TokyoEpidemicSurveillanceFetcher
 from src.fetchers.enhanced_fetcher import (
     DataFetcherConfig,
     EnhancedEpidemicDataFetcher,
@@ -22,6 +29,9 @@ from src.fetchers.enhanced_fetcher import (
     RetryHandler,
 )
 
+# フェッチメソッドが返す(本文, SHA-256ハッシュ, 受信したバイト数)
+TEST_DOWNLOAD = (b"test", hashlib.sha256(b"test").hexdigest(), len(b"test"))
+
 
 class TestRetryHandler(unittest.TestCase):
     """RetryHandlerのテスト"""
@@ -88,32 +98,56 @@ class TestRetryHandler(unittest.TestCase):
 
         self.assertEqual(mock_sleep.call_count, 3)
 
+    @patch("src.fetchers.enhanced_fetcher.time.sleep")
+    def test_execute_sync_with_retry(self, mock_sleep):
+        """同期版リトライ処理のテスト"""
+        func = Mock(side_effect=[RequestsConnectionError("Connection failed"), "success"])
+
+        result = self.handler.execute_sync_with_retry(func, 1, key="value")
+
+        self.assertEqual(result, "success")
+        self.assertEqual(func.call_count, 2)
+        func.assert_called_with(1, key="value")
+        self.assertEqual(mock_sleep.call_count, 1)
+
 
 class TestRateLimiter(unittest.TestCase):
     """RateLimiterのテスト"""
 
-    @patch("time.time")
-    @patch("asyncio.sleep")
-    async def test_rate_limiting(self, mock_sleep, mock_time):
+    @patch("src.fetchers.enhanced_fetcher.time")
+    @patch("src.fetchers.enhanced_fetcher.asyncio")
+    def test_rate_limiting(self, mock_asyncio, mock_time):
         """レート制限のテスト"""
-        # 時刻をモック
-        mock_time.side_effect = [0, 0.5, 1.5]
+        # 時刻をモック（イベントループに影響しないよう、モジュール内の参照のみ差し替える）
+        mock_time.monotonic.side_effect = [0, 0.5, 2.0]
+        mock_sleep = mock_asyncio.sleep = AsyncMock()
 
         limiter = RateLimiter(min_delay=1.0)
 
         # 最初のリクエスト
-        await limiter.wait_if_needed()
+        asyncio.run(limiter.wait_if_needed())
         mock_sleep.assert_not_called()
 
         # 2回目のリクエスト（0.5秒後）
-        await limiter.wait_if_needed()
+        asyncio.run(limiter.wait_if_needed())
         mock_sleep.assert_called_once_with(0.5)
 
-        # 3回目のリクエスト（1.5秒後）
+        # 3回目のリクエスト（2.0秒後、2回目の枠から1秒以上経過）
         mock_sleep.reset_mock()
-        await limiter.wait_if_needed()
+        asyncio.run(limiter.wait_if_needed())
         mock_sleep.assert_not_called()
 
+    @patch("src.fetchers.enhanced_fetcher.time")
+    def test_concurrent_requests_get_distinct_slots(self, mock_time):
+        """同時に到着したリクエストが同じ枠に集中せず、間隔を空けて送信されることのテスト"""
+        mock_time.monotonic.return_value = 0
+        limiter = RateLimiter(min_delay=1.0)
+
+        for _ in range(3):
+            limiter.wait_if_needed_sync()
+
+        self.assertEqual([c.args[0] for c in mock_time.sleep.call_args_list], [1.0, 2.0])
+
 
 class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
     """EnhancedEpidemicDataFetcherのテスト"""
@@ -126,9 +160,10 @@ class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
     def test_fetch_with_retry_success(self, mock_post):
         """正常なデータ取得のテスト"""
         # モックレスポンス
-        mock_response = Mock()
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
         mock_response.status_code = 200
-        mock_response.content = b"test,data\n1,2"
+        mock_response.iter_content.return_value = [b"test,data\n", b"1,2"]
         mock_post.return_value = mock_response
 
         # データ取得（基本フェッチャーのパラメータのみを渡す）
@@ -144,6 +179,48 @@ class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
         self.assertEqual(result.data, b"test,data\n1,2")
         self.assertIsNotNone(result.metadata)
         self.assertEqual(result.metadata.file_size, len(b"test,data\n1,2"))
+        self.assertEqual(result.metadata.sha256_hash, hashlib.sha256(b"test,data\n1,2").hexdigest())
+        self.assertTrue(mock_post.call_args.kwargs["stream"])
+        # フォームはrequestsが辞書からエンコードする場合と同じ本文で送信される
+        self.assertEqual(
+            mock_post.call_args.kwargs["data"],
+            urlencode(
+                {
+                    "val(reportType)": "1",
+                    "val(prefCode)": "13",
+                    "val(hcCode)": "00",
+                    "val(epidCode)": "00",
+                    "val(startYear)": "2025",
+                    "val(startSubPeriod)": "1",
+                    "val(endYear)": "2025",
+                    "val(endSubPeriod)": "1",
+                    "val(totalMode)": "0",
+                }
+            ).encode("ascii"),
+        )
+
+    @patch("src.fetchers.base_fetcher.requests.Session.post")
+    def test_fetch_with_retry_sink_path(self, mock_post):
+        """本文をファイルへ直接書き込む取得のテスト"""
+        mock_response = MagicMock()
+        mock_response.__enter__.return_value = mock_response
+        mock_response.status_code = 200
+        mock_response.iter_content.return_value = [b"test,data\n", b"1,2"]
+        mock_post.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as tmp:
+            sink_path = Path(tmp) / "out.csv"
+            result = asyncio.run(
+                self.fetcher.fetch_with_retry_async(
+                    self.fetcher.fetch_csv_sentinel_weekly_gender, sink_path=sink_path, start_year="2025"
+                )
+            )
+
+            self.assertTrue(result.success)
+            self.assertIsNone(result.data)
+            self.assertEqual(sink_path.read_bytes(), b"test,data\n1,2")
+            self.assertEqual(result.metadata.file_size, len(b"test,data\n1,2"))
+            self.assertEqual(result.metadata.sha256_hash, hashlib.sha256(b"test,data\n1,2").hexdigest())
 
     @patch("src.fetchers.base_fetcher.requests.Session.post")
     def test_fetch_with_retry_failure(self, mock_post):
@@ -162,6 +239,103 @@ class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
         self.assertIsNone(result.data)
         self.assertIsNotNone(result.error)
 
+    def test_session_connection_pool(self):
+        """接続プールの設定とクローズのテスト"""
+        adapter = self.fetcher.session.get_adapter(self.fetcher.BASE_URL)
+        self.assertEqual(adapter._pool_maxsize, self.fetcher.POOL_MAXSIZE)
+
+        # リトライはアダプターで行う
+        self.assertEqual(adapter.max_retries.total, self.config.max_retries)
+        self.assertEqual(adapter.max_retries.backoff_factor, self.config.base_delay)
+        self.assertIn("POST", adapter.max_retries.allowed_methods)
+        self.assertIn(429, adapter.max_retries.status_forcelist)
+
+        # 自前で生成したセッションはクローズ時に閉じる
+        base_fetcher = TokyoEpidemicSurveillanceFetcher()
+        with patch.object(base_fetcher.session, "close") as mock_close:
+            with base_fetcher as fetcher:
+                self.assertIs(fetcher, base_fetcher)
+            mock_close.assert_called_once()
+
+        # 共有セッションは他のインスタンスが使うため閉じない
+        with patch.object(self.fetcher.session, "close") as mock_close:
+            with self.fetcher:
+                pass
+            mock_close.assert_not_called()
+
+    def test_fetch_with_retry_async_runs_request_in_thread(self):
+        """非同期版の取得がイベントループ外のスレッドでHTTP通信を行うことのテスト"""
+        threads = []
+
+        def fetch_method(**params):
+            threads.append(threading.get_ident())
+            return TEST_DOWNLOAD
+
+        async def run():
+            async with self.fetcher as fetcher:
+                return await fetcher.fetch_with_retry_async(fetch_method, start_year="2025"), threading.get_ident()
+
+        result, loop_thread = asyncio.run(run())
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.data, b"test")
+        self.assertEqual(result.metadata.sha256_hash, hashlib.sha256(b"test").hexdigest())
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], loop_thread)
+
+    @patch("src.fetchers.enhanced_fetcher.time.sleep")
+    def test_fetch_with_retry_sync_retry_layer(self, mock_sleep):
+        """共有セッションはアダプター、注入したセッションはPython側でリトライすることのテスト"""
+        # 共有セッション: アダプターが送出したエラー(requestを保持)はリトライせず、フェッチメソッドは1回だけ呼ぶ
+        fetch_method = Mock(side_effect=[RequestsConnectionError("Network error", request=Mock()), TEST_DOWNLOAD])
+        result = self.fetcher.fetch_with_retry(fetch_method, start_year="2025")
+        self.assertFalse(result.success)
+        self.assertEqual(fetch_method.call_count, 1)
+
+        # 共有セッション: 本文の受信中のエラーはアダプターのリトライ対象外のためPython側でリトライ
+        for error in (ChunkedEncodingError("Connection broken"), RequestsConnectionError("Read timed out")):
+            fetch_method = Mock(side_effect=[error, TEST_DOWNLOAD])
+            result = self.fetcher.fetch_with_retry(fetch_method, start_year="2025")
+            self.assertTrue(result.success)
+            self.assertEqual(fetch_method.call_count, 2)
+
+        # 注入したセッション: RetryHandlerでリトライ
+        injected = EnhancedEpidemicDataFetcher(self.config, session=Mock())
+        fetch_method = Mock(side_effect=[RequestsConnectionError("Network error"), TEST_DOWNLOAD])
+        result = injected.fetch_with_retry(fetch_method, start_year="2025")
+        self.assertTrue(result.success)
+        self.assertEqual(fetch_method.call_count, 2)
+
+    @patch("src.fetchers.enhanced_fetcher.asyncio.sleep", new_callable=AsyncMock)
+    def test_fetch_with_retry_async_retry_layer(self, mock_sleep):
+        """非同期版も共有セッションではアダプターでリトライ済みのエラーを重ねてリトライしないことのテスト"""
+        fetch_method = Mock(side_effect=RequestsConnectionError("Network error", request=Mock()))
+        result = asyncio.run(self.fetcher.fetch_with_retry_async(fetch_method, start_year="2025"))
+        self.assertFalse(result.success)
+        self.assertEqual(fetch_method.call_count, 1)
+
+        fetch_method = Mock(side_effect=[ChunkedEncodingError("Connection broken"), TEST_DOWNLOAD])
+        result = asyncio.run(self.fetcher.fetch_with_retry_async(fetch_method, start_year="2025"))
+        self.assertTrue(result.success)
+        self.assertEqual(fetch_method.call_count, 2)
+
+    def test_shared_session(self):
+        """セッションの共有と注入のテスト"""
+        other = EnhancedEpidemicDataFetcher(self.config)
+        self.assertIs(other.session, self.fetcher.session)
+        self.assertIs(self.fetcher.session, EnhancedEpidemicDataFetcher.get_shared_session(self.config))
+        # リトライ設定が異なる場合は別のセッション
+        self.assertIsNot(self.fetcher.session, EnhancedEpidemicDataFetcher.get_shared_session())
+        # User-Agentは共有セッションではなくリクエスト単位で付与
+        self.assertEqual(self.fetcher.request_headers["User-Agent"], self.config.user_agent)
+        self.assertNotEqual(self.fetcher.session.headers["User-Agent"], self.config.user_agent)
+
+        session = Mock()
+        injected = EnhancedEpidemicDataFetcher(self.config, session=session)
+        self.assertIs(injected.session, session)
+        injected.close()
+        session.close.assert_not_called()
+
     def test_get_weeks_in_year(self):
         """年の週数取得のテスト"""
         # 通常年
@@ -196,6 +370,20 @@ class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
         self.assertEqual(metadata.sha256_hash, hashlib.sha256(data).hexdigest())
         self.assertIn("2025", metadata.date_range)
 
+    def test_create_metadata_from_file(self):
+        """書き込み済みファイルからのメタデータ生成のテスト"""
+        data = b"test,data\n" * 10000
+        params = {"data_type": "sentinel_weekly_gender", "start_year": "2025", "start_sub_period": "1"}
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "data.csv"
+            path.write_bytes(data)
+
+            metadata = self.fetcher._create_metadata(path, params)
+
+        self.assertEqual(metadata.file_size, len(data))
+        self.assertEqual(metadata.sha256_hash, hashlib.sha256(data).hexdigest())
+
     def test_get_missing_data(self):
         """欠損データ特定のテスト（新形式）"""
         # 新形式の既存ファイルのモック
@@ -282,16 +470,20 @@ class TestEnhancedEpidemicDataFetcher(unittest.TestCase):
         monthly_params = self.fetcher._parse_existing_files(existing_files, "sentinel_monthly_age")
         self.assertEqual(len(monthly_params), 2)
 
-    @patch("time.sleep")
+    @patch("src.fetchers.enhanced_fetcher.asyncio.sleep", new_callable=AsyncMock)
     def test_fetch_date_range(self, mock_sleep):
         """日付範囲での一括取得のテスト"""
         with patch.object(self.fetcher, "fetch_with_retry") as mock_fetch:
-            mock_fetch.return_value = FetchResult(success=True, data=b"test", metadata=None)
+            mock_fetch.side_effect = lambda method, **params: FetchResult(
+                success=True, data=params["start_sub_period"].encode(), metadata=None
+            )
 
             results = self.fetcher.fetch_date_range("sentinel_weekly_gender", start_date=(2025, 1), end_date=(2025, 3))
 
             self.assertEqual(len(results), 3)
             self.assertEqual(mock_fetch.call_count, 3)
+            # 並行取得でも結果は期間順
+            self.assertEqual([r.data for r in results], [b"1", b"2", b"3"])
             # レート制限の確認
             self.assertEqual(mock_sleep.call_count, 3)
 
@@ -4,6 +4,7 @@
 
 import hashlib
 import json
+import os
 import shutil
 import sys
 import tempfile
@@ -34,6 +35,14 @@ class TestGitHandler(unittest.TestCase):
         mock_run.return_value.returncode = 1
         self.assertFalse(self.git_handler.is_git_repo())
 
+    @patch("subprocess.run")
+    def test_is_git_repo_cached(self, mock_run):
+        """Gitリポジトリ判定は初回のみgitを実行することのテスト"""
+        mock_run.return_value.returncode = 0
+        self.assertTrue(self.git_handler.is_git_repo())
+        self.assertTrue(self.git_handler.is_git_repo())
+        mock_run.assert_called_once()
+
     @patch("subprocess.run")
     def test_add_files_success(self, mock_run):
         """ファイル追加成功のテスト"""
@@ -45,6 +54,24 @@ class TestGitHandler(unittest.TestCase):
 
         self.assertTrue(result)
         mock_run.assert_called_once()
+        # パスは引数ではなくNUL区切りで標準入力から渡される
+        self.assertEqual(mock_run.call_args.kwargs["input"], "/tmp/test1.csv\0/tmp/test2.csv")
+        self.assertNotIn("/tmp/test1.csv", mock_run.call_args.args[0])
+
+    @patch("subprocess.run")
+    def test_commit_hash_from_commit_output(self, mock_run):
+        """git commitの出力からコミットハッシュを取得するテスト（rev-parseを呼ばない）"""
+        commit_hash = "0123456789abcdef0123456789abcdef01234567"
+        mock_run.side_effect = [
+            Mock(returncode=1),  # 変更あり
+            Mock(returncode=0, stdout=f"[main {commit_hash}] Test commit\n 1 file changed\n", stderr=""),
+        ]
+
+        result = self.git_handler.commit("Test commit")
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.commit_hash, commit_hash)
+        self.assertEqual(mock_run.call_count, 2)
 
     @patch("subprocess.run")
     def test_commit_success(self, mock_run):
@@ -149,6 +176,124 @@ class TestStorageManager(unittest.TestCase):
         self.assertTrue(result.is_duplicate)
         self.assertIsNone(result.file_path)
 
+    def test_save_with_metadata_partial_writes(self):
+        """os.writeが一部しか書き込まない場合も全データが保存されることのテスト"""
+        data = b"partial,write\n" * 100
+        real_write = os.write
+
+        with patch("src.managers.storage_manager.os.write", side_effect=lambda fd, buf: real_write(fd, buf[:7])):
+            result = self.storage.save_with_metadata(data=data, data_type="test_type", year=2025, period=1)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.file_path.read_bytes(), data)
+
+    def test_save_with_metadata_precomputed_hash(self):
+        """計算済みのハッシュがあれば再計算せずに使用することのテスト"""
+        data = b"precomputed,data"
+        data_hash = hashlib.sha256(data).hexdigest()
+
+        with patch("src.managers.storage_manager.hashlib.sha256") as mock_sha256:
+            result = self.storage.save_with_metadata(
+                data=data, data_type="test_type", year=2025, period=1, sha256_hash=data_hash
+            )
+
+        self.assertTrue(result.success)
+        mock_sha256.assert_not_called()
+        self.assertEqual(self.storage.hash_index[data_hash], str(result.file_path))
+
+    def test_save_many(self):
+        """複数ファイルの一括保存テスト（ハッシュインデックスは1回だけ書き出す）"""
+        items = [
+            {"data": b"data1", "data_type": "test_type", "year": 2025, "period": 1},
+            {"data": b"data2", "data_type": "test_type", "year": 2025, "period": 2},
+            {"data": b"data1", "data_type": "test_type", "year": 2025, "period": 3},  # 重複
+        ]
+
+        with patch.object(self.storage, "_write_hash_index", wraps=self.storage._write_hash_index) as mock_write:
+            results = self.storage.save_many(items)
+
+        mock_write.assert_called_once()
+        self.assertEqual(len(results), 3)
+        self.assertTrue(results[0].success and results[0].is_new)
+        self.assertTrue(results[1].success and results[1].is_new)
+        self.assertTrue(results[2].is_duplicate)
+
+        loaded_index = json.loads(self.storage.hash_index_file.read_text())
+        self.assertIn(hashlib.sha256(b"data1").hexdigest(), loaded_index)
+        self.assertIn(hashlib.sha256(b"data2").hexdigest(), loaded_index)
+
+    def test_save_many_precomputes_hashes(self):
+        """一括保存でハッシュ未指定のデータだけを事前にハッシュ計算し、入力の辞書は変更しないことのテスト"""
+        items = [
+            {"data": b"hash me", "data_type": "test_type", "year": 2025, "period": 1},
+            {"data": b"given", "data_type": "test_type", "year": 2025, "period": 2, "sha256_hash": "f" * 64},
+            {"data": b"hash me too", "data_type": "test_type", "year": 2025, "period": 3},
+        ]
+
+        prepared = self.storage._with_precomputed_hashes(items)
+
+        self.assertEqual(prepared[0]["sha256_hash"], hashlib.sha256(b"hash me").hexdigest())
+        self.assertIs(prepared[1], items[1])
+        self.assertEqual(prepared[2]["sha256_hash"], hashlib.sha256(b"hash me too").hexdigest())
+        self.assertNotIn("sha256_hash", items[0])
+
+    def test_save_many_compacts_index(self):
+        """一括保存の終了時に、追記ログを統合してファイル名順のインデックスを書き出すことのテスト"""
+        self.storage.save_with_metadata(b"single", "test_type", 2025, 5)
+        self.assertTrue(self.storage.hash_index_log_file.exists())
+
+        items = [
+            {"data": b"later", "data_type": "test_type", "year": 2025, "period": 9},
+            {"data": b"earlier", "data_type": "test_type", "year": 2025, "period": 1},
+        ]
+        self.storage.save_many(items)
+
+        self.assertFalse(self.storage.hash_index_log_file.exists())
+        loaded_index = json.loads(self.storage.hash_index_file.read_text())
+        expected_order = [hashlib.sha256(data).hexdigest() for data in (b"earlier", b"single", b"later")]
+        self.assertEqual(list(loaded_index), expected_order)
+
+    def test_commit_changes_compacts_index_when_skipped(self):
+        """コミットをスキップする場合も追記ログをインデックスに統合することのテスト"""
+        storage = StorageManager(self.base_path, {**self.config, "auto_commit": False})
+        storage.save_with_metadata(b"single", "test_type", 2025, 5)
+        self.assertTrue(storage.hash_index_log_file.exists())
+
+        result = storage.commit_changes()
+
+        self.assertTrue(result.success)
+        self.assertFalse(storage.hash_index_log_file.exists())
+        self.assertIn(hashlib.sha256(b"single").hexdigest(), json.loads(storage.hash_index_file.read_text()))
+
+    def test_batch_save(self):
+        """batch_save内の保存でハッシュインデックスをブロック終了時に1回だけ書き出すテスト"""
+        with (
+            patch.object(self.storage, "_write_hash_index", wraps=self.storage._write_hash_index) as mock_write,
+            self.storage.batch_save(),
+        ):
+            self.storage.save_with_metadata(b"batch1", "test_type", 2025, 1)
+            with self.storage.batch_save():
+                self.storage.save_with_metadata(b"batch2", "test_type", 2025, 2)
+            mock_write.assert_not_called()
+
+        mock_write.assert_called_once()
+        loaded_index = json.loads(self.storage.hash_index_file.read_text())
+        self.assertIn(hashlib.sha256(b"batch1").hexdigest(), loaded_index)
+        self.assertIn(hashlib.sha256(b"batch2").hexdigest(), loaded_index)
+
+    def test_save_failure_keeps_index_and_files(self):
+        """メタデータの書き込みに失敗した場合、CSVとインデックスが更新されず一時ファイルも残らないことのテスト"""
+        result = self.storage.save_with_metadata(b"original", "test_type", 2025, 5)
+        original_hash = hashlib.sha256(b"original").hexdigest()
+
+        with patch("src.managers.storage_manager._write_all", side_effect=[None, OSError("disk full")]):
+            failed = self.storage.save_with_metadata(b"replacement", "test_type", 2025, 5, force_overwrite=True)
+
+        self.assertFalse(failed.success)
+        self.assertEqual(result.file_path.read_bytes(), b"original")
+        self.assertEqual(self.storage._path_to_hash[str(result.file_path)], original_hash)
+        self.assertEqual(list(self.storage.base_path.rglob("*.tmp")), [])
+
     def test_save_with_invalid_data_type(self):
         """不正なdata_type（パストラバーサル攻撃）のテスト"""
         data = b"test,data"
@@ -161,6 +306,7 @@ class TestStorageManager(unittest.TestCase):
             "test;rm -rf /",
             "test$(whoami)",
             "test`ls`",
+            "test\n",
         ]
 
         for invalid_type in invalid_data_types:
@@ -205,6 +351,20 @@ class TestStorageManager(unittest.TestCase):
         files = self.storage.get_existing_files(year=2025)
         self.assertEqual(len(files), 2)
 
+    def test_get_existing_files_cached_until_directory_changes(self):
+        """ディレクトリが変更されるまでファイル一覧を再走査しないことのテスト"""
+        (self.base_path / "test_type_2025_01.csv").touch()
+        self.assertEqual(len(self.storage.get_existing_files()), 1)
+
+        with patch("src.managers.storage_manager.os.scandir", side_effect=AssertionError("must use cache")):
+            self.assertEqual(len(self.storage.get_existing_files(data_type="test_type")), 1)
+
+        # 外部でファイルが追加されると一覧を取り直す
+        (self.base_path / "test_type_2025_02.csv").touch()
+        # 更新時刻の分解能が粗いファイルシステムでも変化が分かるよう、明示的に進める
+        os.utime(self.base_path, ns=(0, self.base_path.stat().st_mtime_ns + 1))
+        self.assertEqual(len(self.storage.get_existing_files()), 2)
+
     def test_get_metadata(self):
         """メタデータ取得のテスト"""
         # テストファイルとメタデータを作成
@@ -231,6 +391,20 @@ class TestStorageManager(unittest.TestCase):
         metadata = self.storage.get_metadata(test_file)
         self.assertIsNone(metadata)
 
+    def test_cleanup_old_files(self):
+        """メタデータのタイムスタンプが古いファイルだけが削除されることのテスト"""
+        timestamps = {"old": "2000-01-01T00:00:00", "new": "2999-01-01T00:00:00"}
+        for stem, timestamp in timestamps.items():
+            (self.base_path / f"{stem}.csv").touch()
+            (self.storage.metadata_dir / f"{stem}.json").write_text(json.dumps({"timestamp": timestamp}))
+        (self.base_path / "no_metadata.csv").touch()
+
+        deleted_count = self.storage.cleanup_old_files(days_to_keep=30)
+
+        self.assertEqual(deleted_count, 1)
+        self.assertEqual([f.name for f in self.storage.get_existing_files()], ["new.csv", "no_metadata.csv"])
+        self.assertFalse((self.storage.metadata_dir / "old.json").exists())
+
     def test_get_storage_stats(self):
         """ストレージ統計情報取得のテスト"""
         # テストファイルを作成（フラット構造）
@@ -359,6 +533,22 @@ class TestStorageManager(unittest.TestCase):
         self.assertNotIn(initial_hash, self.storage.hash_index)
         self.assertIn(updated_hash, self.storage.hash_index)
 
+    def test_force_overwrite_uses_indexed_hash(self):
+        """force_overwriteで既存ファイルを読み直さず、インデックス上のハッシュを削除することのテスト"""
+        initial_data = b"initial content"
+        initial_hash = hashlib.sha256(initial_data).hexdigest()
+        result = self.storage.save_with_metadata(initial_data, "test_type", 2025, 4)
+
+        # インデックス外でファイル内容が変わっていても、インデックス上のエントリが削除される
+        result.file_path.write_bytes(b"modified outside")
+        with patch.object(Path, "read_bytes", side_effect=AssertionError("existing file must not be read")):
+            result = self.storage.save_with_metadata(b"updated content", "test_type", 2025, 4, force_overwrite=True)
+
+        self.assertTrue(result.success)
+        self.assertNotIn(initial_hash, self.storage.hash_index)
+        updated_hash = hashlib.sha256(b"updated content").hexdigest()
+        self.assertEqual(self.storage._path_to_hash[str(result.file_path)], updated_hash)
+
     def test_force_overwrite_with_same_data(self):
         """同じデータでforce_overwriteした場合のテスト"""
         # 同じデータで2回保存
@@ -490,7 +680,9 @@ class TestStorageManager(unittest.TestCase):
         for data, dtype, year, period in files_data:
             self.storage.save_with_metadata(data=data, data_type=dtype, year=year, period=period, is_monthly=False)
 
-        # hash_index.jsonを読み込んでソート確認
+        # 追記ログをインデックスに統合してからhash_index.jsonを読み込んでソート確認
+        self.storage.compact_hash_index()
+        self.assertFalse(self.storage.hash_index_log_file.exists())
         hash_index_path = self.storage.hash_index_file
         self.assertTrue(hash_index_path.exists())
 
@@ -531,7 +723,8 @@ class TestStorageManager(unittest.TestCase):
                 force_overwrite=True,  # 重複を許可
             )
 
-        # hash_index.jsonを読み込んで確認
+        # 追記ログを統合してからhash_index.jsonを読み込んで確認
+        self.storage.compact_hash_index()
         with self.storage.hash_index_file.open() as f:
             loaded_index = json.load(f)
 
@@ -543,6 +736,24 @@ class TestStorageManager(unittest.TestCase):
                 # 3つのファイルが記録されているはずだが、重複チェックで実際は1つかも
                 # この動作はforce_overwriteとcheck_duplicatesの実装に依存
 
+    def test_hash_index_log_replayed_on_load(self):
+        """追記ログの変更が再読み込み時にインデックスへ反映されることをテスト"""
+        self.storage.save_with_metadata(data=b"a,b\n1,2", data_type="type_a", year=2025, period=1)
+        self.storage.save_with_metadata(data=b"c,d\n3,4", data_type="type_b", year=2025, period=1)
+        self.storage.save_with_metadata(data=b"e,f\n5,6", data_type="type_a", year=2025, period=1, force_overwrite=True)
+
+        # 直近の変更はインデックス全体を書き直さずログに追記されている
+        self.assertTrue(self.storage.hash_index_log_file.exists())
+
+        reloaded = StorageManager(self.base_path, self.config)
+        self.assertEqual(reloaded.hash_index, self.storage.hash_index)
+        self.assertNotIn(hashlib.sha256(b"a,b\n1,2").hexdigest(), reloaded.hash_index)
+
+        # 統合後はJSONだけで同じインデックスが復元できる
+        reloaded.compact_hash_index()
+        self.assertFalse(reloaded.hash_index_log_file.exists())
+        self.assertEqual(StorageManager(self.base_path, self.config).hash_index, reloaded.hash_index)
+
 
 if __name__ == "__main__":
     unittest.main()
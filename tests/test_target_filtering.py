@@ -28,6 +28,7 @@ class TestTargetFiltering(unittest.TestCase):
         self.mock_config.collection.start_year = 2025
         self.mock_config.collection.end_year = 2025
         self.mock_config.collection.batch_size = 10
+        self.mock_config.collection.concurrency = 2
         self.mock_config.collection.incremental_mode = False
         self.mock_config.collection.max_execution_time_hours = 2
 
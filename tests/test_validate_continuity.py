@@ -3,6 +3,7 @@
 """
 
 import json
+import os
 import sys
 import tempfile
 import unittest
@@ -82,9 +83,7 @@ class TestContinuityValidator(unittest.TestCase):
 
         # 検証
         self.assertFalse(report.is_valid)
-        self.assertEqual(len(report.missing_periods), 1)
-        self.assertEqual(report.missing_periods[0]["year"], 2025)
-        self.assertEqual(report.missing_periods[0]["period"], 3)
+        self.assertEqual(report.missing_periods, [(2025, 3)])
 
     def test_validate_monthly_data(self):
         """月次データの検証"""
@@ -105,10 +104,11 @@ class TestContinuityValidator(unittest.TestCase):
 
         # 検証
         self.assertFalse(report.is_valid)
-        self.assertEqual(len(report.missing_periods), 1)
-        self.assertEqual(report.missing_periods[0]["year"], 2025)
-        self.assertEqual(report.missing_periods[0]["period"], 3)
-        self.assertEqual(report.missing_periods[0]["type"], "monthly")
+        self.assertEqual(report.missing_periods, [(2025, 3)])
+        self.assertEqual(
+            report.missing_as_dicts(),
+            [{"year": 2025, "period": 3, "type": "monthly", "filename": "sentinel_monthly_age_2025_03.csv"}],
+        )
 
     def test_validate_week_53(self):
         """53週がある年の検証"""
@@ -124,13 +124,11 @@ class TestContinuityValidator(unittest.TestCase):
 
             # _get_weeks_in_yearが53を返すようにモック
             with patch.object(self.validator, "_get_weeks_in_year", return_value=53):
-                # _generate_expected_periodsを呼び出して期待値を確認
-                expected = self.validator._generate_expected_periods(
-                    "sentinel_weekly_gender", 2020, 2020, is_monthly=False
-                )
+                # _generate_expected_masksを呼び出して期待値を確認
+                expected = self.validator._generate_expected_masks(2020, 2020, is_monthly=False)
 
                 # 53週が含まれることを確認
-                self.assertIn((2020, 53), expected)
+                self.assertTrue(expected[2020] >> 53 & 1)
 
     def test_validate_all(self):
         """全データタイプの検証"""
@@ -156,6 +154,37 @@ class TestContinuityValidator(unittest.TestCase):
         self.assertIn("sentinel_monthly_age", reports)
         self.assertIn("notifiable_weekly", reports)
 
+    def test_validate_all_scans_directory_once(self):
+        """全データタイプの検証でディレクトリ走査が1回だけ行われることを確認"""
+        self._create_test_files(["sentinel_weekly_gender_2025_01.csv", "NOTIFIABLE_WEEKLY_2025_01.CSV"])
+
+        with patch("scripts.validate_continuity.datetime") as mock_datetime:
+            mock_datetime.now.return_value.year = 2025
+            mock_datetime.now.return_value.month = 1
+            mock_datetime.now.return_value.isocalendar.return_value = (2025, 1, 1)
+
+            with patch("scripts.validate_continuity.os.scandir", wraps=os.scandir) as mock_scandir:
+                reports = self.validator.validate_all(2025, 2025)
+
+        mock_scandir.assert_called_once()
+        self.assertEqual(reports["sentinel_weekly_gender"].actual_count, 1)
+        # 大文字小文字を区別せずに認識される
+        self.assertEqual(reports["notifiable_weekly"].actual_count, 1)
+
+    def test_validate_all_uses_single_now(self):
+        """全データタイプの検証で現在時刻の取得が1回だけ行われることを確認"""
+        self._create_test_files(["sentinel_weekly_gender_2025_01.csv", "sentinel_monthly_age_2025_01.csv"])
+
+        with patch("scripts.validate_continuity.datetime") as mock_datetime:
+            mock_datetime.now.return_value.year = 2025
+            mock_datetime.now.return_value.month = 1
+            mock_datetime.now.return_value.isocalendar.return_value = (2025, 1, 1)
+
+            self.validator.validate_all(2025, 2025)
+
+        mock_datetime.now.assert_called_once()
+        self.assertIsNone(self.validator._now)
+
     def test_generate_json_report(self):
         """JSONレポート生成のテスト"""
         # レポートを作成
@@ -165,10 +194,7 @@ class TestContinuityValidator(unittest.TestCase):
             end_year=2025,
             expected_count=10,
             actual_count=8,
-            missing_periods=[
-                {"year": 2025, "period": 3, "type": "weekly", "filename": "test_2025_03.csv"},
-                {"year": 2025, "period": 5, "type": "weekly", "filename": "test_2025_05.csv"},
-            ],
+            missing_periods=[(2025, 3), (2025, 5)],
             is_valid=False,
         )
 
@@ -181,6 +207,10 @@ class TestContinuityValidator(unittest.TestCase):
         # 検証
         self.assertIn("test_data", data)
         self.assertEqual(data["test_data"]["missing_count"], 2)
+        self.assertEqual(
+            data["test_data"]["missing_periods"][0],
+            {"year": 2025, "period": 3, "type": "weekly", "filename": "test_data_2025_03.csv"},
+        )
         self.assertFalse(data["test_data"]["is_valid"])
 
     def test_generate_text_report(self):
@@ -213,7 +243,7 @@ class TestContinuityValidator(unittest.TestCase):
             end_year=2025,
             expected_count=10,
             actual_count=9,
-            missing_periods=[{"year": 2025, "period": 5, "type": "weekly", "filename": "weekly_2025_05.csv"}],
+            missing_periods=[(2025, 5)],
             is_valid=False,
         )
 
@@ -239,6 +269,25 @@ class TestContinuityValidator(unittest.TestCase):
         self.assertIn("✅", md_output)  # 正常データ
         self.assertIn("❌", md_output)  # 欠損データ
 
+    def test_report_by_year(self):
+        """欠損期間の年ごとのグループ化"""
+        report = ContinuityReport(
+            data_type="weekly_data",
+            start_year=2024,
+            end_year=2025,
+            expected_count=10,
+            actual_count=7,
+            missing_periods=[(2025, 2), (2024, 5), (2025, 1)],
+            is_valid=False,
+        )
+
+        by_year = report.by_year()
+
+        self.assertEqual(by_year, {2024: [5], 2025: [1, 2]})
+        self.assertEqual(list(by_year), [2024, 2025])
+        # 2回目以降はキャッシュが返る
+        self.assertIs(report.by_year(), by_year)
+
     def test_empty_directory(self):
         """空のディレクトリでの検証"""
         report = self.validator.validate_data_type("sentinel_weekly_gender", 2025, 2025)
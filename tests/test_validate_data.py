@@ -0,0 +1,135 @@
+"""
+データ妥当性検証のテスト
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# パスの設定
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.validate_data import EXPECTED_ENCODING, DataValidator
+
+
+class TestCheckContent(unittest.TestCase):
+    """エンコーディング・CSVフォーマットの一括チェックのテスト"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.validator = DataValidator()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _write(self, name: str, data: bytes) -> Path:
+        file_path = Path(self.temp_dir) / name
+        file_path.write_bytes(data)
+        return file_path
+
+    def test_valid_csv(self):
+        """有効なCSVの行数とカラム数が結果に反映されることのテスト"""
+        file_path = self._write("valid.csv", "定点,報告数\n東京,10\n".encode(EXPECTED_ENCODING))
+
+        encoding_result, csv_result = self.validator._check_content(file_path)
+
+        self.assertTrue(encoding_result["valid"])
+        self.assertTrue(csv_result["valid"])
+        self.assertEqual((csv_result["line_count"], csv_result["min_columns"], csv_result["max_columns"]), (2, 2, 2))
+        self.assertEqual(csv_result["column_variations"], 1)
+
+    def test_quoted_csv(self):
+        """引用符で囲まれたカンマを区切りとして数えないことのテスト"""
+        file_path = self._write("quoted.csv", b'a,"b,c"\n1,2\n')
+
+        _, csv_result = self.validator._check_content(file_path)
+
+        self.assertEqual((csv_result["line_count"], csv_result["min_columns"], csv_result["max_columns"]), (2, 2, 2))
+
+    def test_inconsistent_columns_warning(self):
+        """カラム数が行によって異なる場合に警告されることのテスト"""
+        file_path = self._write("inconsistent.csv", b"a,b\n1,2,3\n")
+
+        _, csv_result = self.validator._check_content(file_path)
+
+        self.assertIn("Inconsistent column count: {2, 3}", csv_result["warnings"])
+        self.assertEqual(csv_result["column_variations"], 2)
+
+    def test_sample_ending_inside_multibyte_character(self):
+        """サンプルの末尾でマルチバイト文字が途切れてもエンコーディングエラーにならないことのテスト"""
+        file_path = self._write("sample.csv", "a,東京\n".encode(EXPECTED_ENCODING))
+
+        with patch("scripts.validate_data.ENCODING_SAMPLE_BYTES", 3):
+            encoding_result, _ = self.validator._check_content(file_path)
+
+        self.assertTrue(encoding_result["valid"])
+
+    def test_decode_error_after_sample(self):
+        """先頭のサンプル以降にあるデコードエラーもCSVフォーマットのエラーとして検出することのテスト"""
+        file_path = self._write("late_error.csv", b"a,b\n" * 10 + b"\xff,b\n")
+
+        with patch("scripts.validate_data.ENCODING_SAMPLE_BYTES", 8):
+            encoding_result, csv_result = self.validator._check_content(file_path)
+
+        self.assertTrue(encoding_result["valid"])
+        self.assertFalse(csv_result["valid"])
+
+    def test_invalid_encoding(self):
+        """Shift_JISとしてデコードできない場合にエラーとなることのテスト"""
+        file_path = self._write("invalid.csv", b"a,b\n\xff,1\n")
+
+        encoding_result, csv_result = self.validator._check_content(file_path)
+
+        self.assertFalse(encoding_result["valid"])
+        self.assertFalse(csv_result["valid"])
+
+
+class TestPathsAndDirectories(unittest.TestCase):
+    """パスの安全性チェックとディレクトリ走査のテスト"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.data_dir = Path(self.temp_dir)
+        self.validator = DataValidator()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_dangerous_patterns_reported_in_order(self):
+        """危険なパターンが定義順に重複なく報告されることのテスト"""
+        result = self.validator._check_path_safety(Path("data/$x;y;../z.csv"))
+
+        dangerous = [e for e in result["errors"] if e.startswith("Dangerous pattern")]
+        self.assertEqual(
+            dangerous,
+            ["Dangerous pattern in path: ../", "Dangerous pattern in path: ;", "Dangerous pattern in path: $"],
+        )
+
+    def test_list_files_case_insensitive(self):
+        """拡張子の大文字小文字を区別せず、ドットファイルを除外してサイズとともに列挙することのテスト"""
+        (self.data_dir / "b.CSV").write_bytes(b"12345")
+        (self.data_dir / "a.csv").write_bytes(b"1")
+        (self.data_dir / ".hidden.csv").write_bytes(b"1")
+        (self.data_dir / "c.txt").write_bytes(b"1")
+
+        files, sizes = self.validator._list_files(self.data_dir, "*.csv")
+
+        self.assertEqual([f.name for f in files], ["a.csv", "b.CSV"])
+        self.assertEqual(sizes, [1, 5])
+
+    def test_validate_directory_keeps_listing_order(self):
+        """並列に検証しても結果がファイルの列挙順に並ぶことのテスト"""
+        for i in range(10):
+            (self.data_dir / f"file_{i}.csv").write_bytes(b"a,b\n" * 30)
+
+        results = self.validator.validate_directory(self.data_dir)
+
+        self.assertEqual([Path(r["file"]).name for r in results], [f"file_{i}.csv" for i in range(10)])
+        self.assertEqual(results[0]["checks"]["file_size"]["size_bytes"], 120)
+
+
+if __name__ == "__main__":
+    unittest.main()